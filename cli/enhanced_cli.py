@@ -124,7 +124,7 @@ def add_server():
         port = int(port)
         
         print(f"\n🔍 Testing connection to {host}:{port}...")
-        success, message = ssh_manager.test_connection(host, port, username, password)
+        success, message = ssh_manager.test_connection(host, port, username, password, keep_open=True)
         
         if success:
             print(f"✅ {message}")
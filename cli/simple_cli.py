@@ -128,7 +128,7 @@ class PasRahCLI:
             port = int(port)
             
             print(f"\n🔍 Testing connection to {host}:{port}...")
-            success, message = self.ssh_manager.test_connection(host, port, username, password)
+            success, message = self.ssh_manager.test_connection(host, port, username, password, keep_open=True)
             
             if success:
                 print(f"✅ {message}")
@@ -7,9 +7,12 @@ Enhanced Configuration Manager Module with UDP Support
 import json
 import os
 import sqlite3
+import threading
+import time
+from contextlib import closing
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import hashlib
 from cryptography.fernet import Fernet
 import base64
@@ -21,6 +24,10 @@ class ConfigManager:
         self.logs_dir = self.base_dir / "logs"
         self.config_file = self.data_dir / "config.json"
         self.db_file = self.data_dir / "pasrah.db"
+        self._helper_pids_json = {}  # tunnel_id -> encoded helper_pids
+        self._last_log_prune = 0.0
+        self.records_version = 0  # bumped on every server/tunnel change (API ETags)
+        self.lock = threading.RLock()  # guards record updates from worker threads
         
         # Create directories
         self.data_dir.mkdir(parents=True, exist_ok=True)
@@ -55,12 +62,30 @@ class ConfigManager:
         
         # Load or create config
         self.config = self.load_config()
+        self._load_records()
+        servers_changed, tunnels_changed = self._upgrade_config_format()
+        if servers_changed or tunnels_changed:
+            # Rows written by older versions may still carry legacy fields
+            self._persist_records(servers=servers_changed, tunnels=tunnels_changed)
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a database connection with memory-mapped reads enabled"""
+        conn = sqlite3.connect(self.db_file)
+        conn.execute("PRAGMA mmap_size=268435456")  # 256 MB
+        return conn
     
     def _init_database(self):
         """Initialize SQLite database for logs and monitoring"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         
+        # Storage layout (only takes effect before the first table is created)
+        cursor.execute("PRAGMA page_size=4096")
+        # Let pruned log rows be reclaimed incrementally (applies to new databases)
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        # WAL lets stats readers run without blocking log writers
+        cursor.execute("PRAGMA journal_mode=WAL")
+        
         # Create tables
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS tunnel_logs (
@@ -98,6 +123,12 @@ class ConfigManager:
             )
         ''')
         
+        # Per-tunnel time-window queries (stats, bandwidth totals) use a range scan
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_bandwidth_stats_tunnel_time
+            ON bandwidth_stats (tunnel_id, timestamp)
+        ''')
+        
         # NEW: Table for tunnel process tracking
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS tunnel_processes (
@@ -112,9 +143,91 @@ class ConfigManager:
             )
         ''')
         
+        # Servers and tunnels are stored one row per record (JSON document)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS servers (
+                id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS tunnels (
+                id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
         conn.commit()
         conn.close()
     
+    def _load_records(self):
+        """Load servers and tunnels from database, migrating legacy config.json entries"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT id, data FROM servers')
+        servers = {row[0]: json.loads(row[1]) for row in cursor.fetchall()}
+        cursor.execute('SELECT id, data FROM tunnels')
+        tunnels = {row[0]: json.loads(row[1]) for row in cursor.fetchall()}
+        
+        conn.close()
+        
+        if servers or tunnels:
+            self.config["servers"] = servers
+            self.config["tunnels"] = tunnels
+        elif self.config["servers"] or self.config["tunnels"]:
+            # Older versions kept servers/tunnels in config.json; clean them
+            # (legacy pid, password_hash) before they are written to the database
+            self._upgrade_config_format()
+            if self._sync_records():
+                self.save_config()
+    
+    def _persist_records(self, servers: List[str] = (), tunnels: List[str] = ()) -> bool:
+        """Write (or delete, if no longer configured) individual server/tunnel rows"""
+        try:
+            with self.lock:
+                self.records_version += 1  # in-memory records already changed, even if the write fails
+                with closing(self._connect()) as conn:
+                    cursor = conn.cursor()
+                    now = datetime.now().isoformat()
+                    
+                    for table, record_ids in (("servers", servers), ("tunnels", tunnels)):
+                        for record_id in record_ids:
+                            record = self.config[table].get(record_id)
+                            if record is None:
+                                cursor.execute(f'DELETE FROM {table} WHERE id = ?', (record_id,))
+                            else:
+                                cursor.execute(f'''
+                                    INSERT OR REPLACE INTO {table} (id, data, updated_at)
+                                    VALUES (?, ?, ?)
+                                ''', (record_id, json.dumps(record, ensure_ascii=False), now))
+                    
+                    conn.commit()
+            return True
+        except Exception as e:
+            print(f"Error saving records: {e}")
+            return False
+    
+    def _sync_records(self) -> bool:
+        """Replace all stored server/tunnel rows with the in-memory config"""
+        try:
+            with self.lock, closing(self._connect()) as conn:
+                cursor = conn.cursor()
+                cursor.execute('DELETE FROM servers')
+                cursor.execute('DELETE FROM tunnels')
+                conn.commit()
+        except Exception as e:
+            print(f"Error saving records: {e}")
+            return False
+        
+        return self._persist_records(
+            servers=list(self.config["servers"]),
+            tunnels=list(self.config["tunnels"])
+        )
+    
     def load_config(self) -> Dict:
         """Load configuration from file"""
         if self.config_file.exists():
@@ -141,10 +254,14 @@ class ConfigManager:
                 base_dict[key] = value
     
     def save_config(self) -> bool:
-        """Save configuration to file"""
+        """Save configuration to file (servers and tunnels live in the database)"""
         try:
+            file_config = {
+                key: value for key, value in self.config.items()
+                if key not in ("servers", "tunnels")
+            }
             with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=2, ensure_ascii=False)
+                json.dump(file_config, f, indent=2, ensure_ascii=False)
             return True
         except Exception as e:
             print(f"Error saving config: {e}")
@@ -157,7 +274,6 @@ class ConfigManager:
             "host": server_data["host"],
             "port": server_data.get("port", 22),
             "username": server_data["username"],
-            "password_hash": self._hash_password(server_data.get("password", "")),
             "status": "unknown",
             "added_date": datetime.now().isoformat(),
             "last_check": None,
@@ -167,13 +283,13 @@ class ConfigManager:
                 "udp_support": False       # NEW: Track UDP capability
             }
         }
-        return self.save_config()
+        return self._persist_records(servers=[server_id])
     
     def remove_server(self, server_id: str) -> bool:
         """Remove a foreign server"""
         if server_id in self.config["servers"]:
             del self.config["servers"][server_id]
-            return self.save_config()
+            return self._persist_records(servers=[server_id])
         return False
     
     def add_tunnel(self, tunnel_id: str, tunnel_data: Dict) -> bool:
@@ -188,7 +304,6 @@ class ConfigManager:
             "tunnel_type": tunnel_data.get("tunnel_type", "tcp").lower(),  # NEW: tcp or udp
             "status": "inactive",
             "created_date": datetime.now().isoformat(),
-            "pid": None,
             "auto_start": tunnel_data.get("auto_start", True),
             "description": tunnel_data.get("description", ""),
             "process_info": {  # NEW: Enhanced process tracking
@@ -202,7 +317,7 @@ class ConfigManager:
         if tunnel_data["server_id"] in self.config["servers"]:
             self.config["servers"][tunnel_data["server_id"]]["tunnels"].append(tunnel_id)
         
-        return self.save_config()
+        return self._persist_records(servers=[tunnel_data["server_id"]], tunnels=[tunnel_id])
     
     def remove_tunnel(self, tunnel_id: str) -> bool:
         """Remove a tunnel configuration"""
@@ -217,9 +332,10 @@ class ConfigManager:
             
             # Clean up process tracking
             self._remove_tunnel_process_info(tunnel_id)
+            self._helper_pids_json.pop(tunnel_id, None)
             
             del self.config["tunnels"][tunnel_id]
-            return self.save_config()
+            return self._persist_records(servers=[server_id], tunnels=[tunnel_id])
         return False
     
     def get_servers(self) -> Dict:
@@ -238,34 +354,55 @@ class ConfigManager:
         """Get specific tunnel"""
         return self.config["tunnels"].get(tunnel_id)
     
+    def get_tunnel_pid(self, tunnel_id: str) -> Optional[int]:
+        """Get the main process PID recorded for a tunnel"""
+        tunnel = self.config["tunnels"].get(tunnel_id, {})
+        return tunnel.get("process_info", {}).get("main_pid")
+    
     def update_tunnel_status(self, tunnel_id: str, status: str, pid: Optional[int] = None):
         """Update tunnel status with enhanced process tracking"""
-        if tunnel_id in self.config["tunnels"]:
-            self.config["tunnels"][tunnel_id]["status"] = status
-            if pid is not None:
-                self.config["tunnels"][tunnel_id]["pid"] = pid
-                self.config["tunnels"][tunnel_id]["process_info"]["main_pid"] = pid
-            
-            # Update process table
-            self._update_tunnel_process_info(tunnel_id, status, pid)
-            self.save_config()
+        with self.lock:
+            if tunnel_id in self.config["tunnels"]:
+                self.config["tunnels"][tunnel_id]["status"] = status
+                if pid is not None:
+                    self.config["tunnels"][tunnel_id]["process_info"]["main_pid"] = pid
+                
+                # Update process table
+                self._update_tunnel_process_info(tunnel_id, status, pid)
+                self._persist_records(tunnels=[tunnel_id])
+    
+    def get_tunnel_helper_pids(self, tunnel_id: str) -> List[int]:
+        """Get helper process PIDs (e.g. socat bridges) recorded for a tunnel"""
+        tunnel = self.config["tunnels"].get(tunnel_id, {})
+        return list(tunnel.get("process_info", {}).get("helper_pids", []))
+    
+    def set_tunnel_helper_pids(self, tunnel_id: str, helper_pids: List[int]):
+        """Set helper process PIDs (e.g. socat bridges) for a tunnel"""
+        with self.lock:
+            if tunnel_id in self.config["tunnels"]:
+                self.config["tunnels"][tunnel_id]["process_info"]["helper_pids"] = list(helper_pids)
+                self._helper_pids_json[tunnel_id] = json.dumps(list(helper_pids))
+                # Persist so leftover helpers can be found after a restart
+                self._persist_records(tunnels=[tunnel_id])
     
     def update_server_status(self, server_id: str, status: str):
         """Update server status"""
-        if server_id in self.config["servers"]:
-            self.config["servers"][server_id]["status"] = status
-            self.config["servers"][server_id]["last_check"] = datetime.now().isoformat()
-            self.save_config()
+        with self.lock:
+            if server_id in self.config["servers"]:
+                self.config["servers"][server_id]["status"] = status
+                self.config["servers"][server_id]["last_check"] = datetime.now().isoformat()
+                self._persist_records(servers=[server_id])
     
     def update_server_capabilities(self, server_id: str, capabilities: Dict):
         """Update server capabilities (e.g., socat availability)"""
-        if server_id in self.config["servers"]:
-            self.config["servers"][server_id]["capabilities"].update(capabilities)
-            self.save_config()
+        with self.lock:
+            if server_id in self.config["servers"]:
+                self.config["servers"][server_id]["capabilities"].update(capabilities)
+                self._persist_records(servers=[server_id])
     
     def log_event(self, table: str, **kwargs):
         """Log an event to database with UDP support"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         
         if table == "tunnel_logs":
@@ -304,10 +441,54 @@ class ConfigManager:
         
         conn.commit()
         conn.close()
+        
+        # Apply log retention at most once per hour
+        if time.time() - self._last_log_prune >= 3600:
+            self._prune_logs()
+    
+    def log_bandwidth_batch(self, rows: List[Tuple]):
+        """Insert many (tunnel_id, bytes_in, bytes_out, duration, tunnel_type) rows in one transaction"""
+        if not rows:
+            return
+        
+        conn = self._connect()
+        conn.executemany('''
+            INSERT INTO bandwidth_stats (tunnel_id, bytes_in, bytes_out, duration, tunnel_type)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows)
+        conn.commit()
+        conn.close()
+        
+        # bandwidth_stats grows fastest, so it must trigger retention too
+        if time.time() - self._last_log_prune >= 3600:
+            self._prune_logs()
+    
+    def _prune_logs(self):
+        """Keep only the newest max_logs rows in each log table"""
+        self._last_log_prune = time.time()
+        max_logs = self.config["settings"].get("max_logs", 1000)
+        
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        pruned = 0
+        for table in ("tunnel_logs", "server_logs", "bandwidth_stats"):
+            cursor.execute(f'''
+                DELETE FROM {table} WHERE id <= (
+                    SELECT id FROM {table} ORDER BY id DESC LIMIT 1 OFFSET ?
+                )
+            ''', (max_logs,))
+            pruned += cursor.rowcount
+        conn.commit()
+        
+        if pruned:
+            cursor.execute("PRAGMA incremental_vacuum(100)")
+        
+        conn.close()
     
     def _update_tunnel_process_info(self, tunnel_id: str, status: str, pid: Optional[int]):
         """Update tunnel process information in database"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         
         tunnel = self.get_tunnel(tunnel_id)
@@ -316,7 +497,10 @@ class ConfigManager:
             return
         
         tunnel_type = tunnel.get("tunnel_type", "tcp")
-        helper_pids = json.dumps(tunnel.get("process_info", {}).get("helper_pids", []))
+        helper_pids = self._helper_pids_json.get(tunnel_id)
+        if helper_pids is None:
+            helper_pids = json.dumps(tunnel.get("process_info", {}).get("helper_pids", []))
+            self._helper_pids_json[tunnel_id] = helper_pids
         
         cursor.execute('''
             INSERT OR REPLACE INTO tunnel_processes 
@@ -329,7 +513,7 @@ class ConfigManager:
     
     def _remove_tunnel_process_info(self, tunnel_id: str):
         """Remove tunnel process information from database"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('DELETE FROM tunnel_processes WHERE tunnel_id = ?', (tunnel_id,))
@@ -339,7 +523,7 @@ class ConfigManager:
     
     def get_tunnel_stats(self, tunnel_id: str, hours: int = 24) -> List[Dict]:
         """Get tunnel bandwidth statistics"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -362,9 +546,24 @@ class ConfigManager:
         conn.close()
         return stats
     
+    def get_tunnel_bandwidth_totals(self, tunnel_id: str, hours: int = 24) -> Tuple[int, int]:
+        """Get total bytes in/out of a tunnel over the last hours"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT COALESCE(SUM(bytes_in), 0), COALESCE(SUM(bytes_out), 0)
+            FROM bandwidth_stats
+            WHERE tunnel_id = ? AND timestamp >= datetime('now', ?)
+        ''', (tunnel_id, f"-{int(hours)} hours"))
+        
+        total_in, total_out = cursor.fetchone()
+        conn.close()
+        return total_in, total_out
+    
     def get_active_processes(self) -> List[Dict]:
         """Get all active tunnel processes"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -400,19 +599,19 @@ class ConfigManager:
                 }
             }
             
-            data_json = json.dumps(export_data, indent=2)
-            
             if password:
-                # Encrypt with password
+                # Encrypt with password (Fernet needs the whole payload)
                 key = self._derive_key(password)
                 fernet = Fernet(key)
-                encrypted_data = fernet.encrypt(data_json.encode())
+                data_bytes = json.dumps(export_data, separators=(',', ':')).encode()
+                encrypted_data = fernet.encrypt(data_bytes)
                 
                 with open(export_path, 'wb') as f:
                     f.write(encrypted_data)
             else:
+                # Stream straight to the file; exports are machine-read
                 with open(export_path, 'w') as f:
-                    f.write(data_json)
+                    json.dump(export_data, f, separators=(',', ':'))
             
             return True
         except Exception as e:
@@ -444,20 +643,24 @@ class ConfigManager:
             
             # Import new config
             self.config = import_data["config"]
+            self._helper_pids_json.clear()
             
             # Ensure compatibility with new features
             self._upgrade_config_format()
             
-            return self.save_config()
+            return self._sync_records() and self.save_config()
             
         except Exception as e:
             print(f"Import failed: {e}")
             return False
     
-    def _upgrade_config_format(self):
-        """Upgrade old config format to support new features"""
+    def _upgrade_config_format(self) -> Tuple[List[str], List[str]]:
+        """Upgrade old config format to support new features; returns changed server/tunnel ids"""
+        servers_changed, tunnels_changed = [], []
+        
         # Add UDP support fields to existing tunnels
         for tunnel_id, tunnel in self.config["tunnels"].items():
+            changed = "pid" in tunnel or "tunnel_type" not in tunnel or "process_info" not in tunnel
             if "tunnel_type" not in tunnel:
                 tunnel["tunnel_type"] = "tcp"
             if "process_info" not in tunnel:
@@ -466,24 +669,34 @@ class ConfigManager:
                     "helper_pids": [],
                     "intermediate_ports": []
                 }
+            elif tunnel["process_info"].get("main_pid") is None:
+                tunnel["process_info"]["main_pid"] = tunnel.get("pid")
+            # PID is tracked in process_info only
+            tunnel.pop("pid", None)
+            if changed:
+                tunnels_changed.append(tunnel_id)
         
         # Add capabilities to existing servers
         for server_id, server in self.config["servers"].items():
+            changed = "password_hash" in server
             if "capabilities" not in server:
                 server["capabilities"] = {
                     "socat_installed": False,
                     "udp_support": False
                 }
+                changed = True
+            # Servers authenticate with the PasRah SSH key; never keep password hashes
+            server.pop("password_hash", None)
+            if changed:
+                servers_changed.append(server_id)
         
         # Update settings
         if "support_udp_tunnels" not in self.config["settings"]:
             self.config["settings"]["support_udp_tunnels"] = True
         if "socat_path" not in self.config["settings"]:
             self.config["settings"]["socat_path"] = "/usr/bin/socat"
-    
-    def _hash_password(self, password: str) -> str:
-        """Hash password for storage"""
-        return hashlib.sha256(password.encode()).hexdigest()
+        
+        return servers_changed, tunnels_changed
     
     def _derive_key(self, password: str) -> bytes:
         """Derive encryption key from password"""
@@ -8,21 +8,44 @@ import paramiko
 import socket
 import time
 import os
-import subprocess
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 import threading
 import io
+from concurrent.futures import ThreadPoolExecutor
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
 
 class SSHManager:
+    # Options for key-based connections: no zlib, and skip software-slow
+    # CBC/3DES ciphers so AES (hardware accelerated) is negotiated
+    KEY_CONNECT_OPTIONS = {
+        "compress": False,
+        "disabled_algorithms": {
+            "ciphers": ["3des-cbc", "blowfish-cbc", "aes128-cbc", "aes192-cbc", "aes256-cbc"]
+        }
+    }
+    
+    # How long a session opened by test_connection(keep_open=True) waits for setup_server
+    PENDING_TTL = 120  # seconds
+    
     def __init__(self, config_manager):
         self.config_manager = config_manager
         self.ssh_connections = {}  # server_id -> SSHClient
+        self.pending_connections = {}  # (host, port, username) -> tested SSHClient
+        self.connections_lock = threading.RLock()  # guards both connection dicts
+        self._server_locks = {}  # server_id -> Lock serializing (re)connects
         self.ssh_key_path = Path(config_manager.config["ssh_keys"]["private_key_path"])
         self.ssh_pub_path = Path(config_manager.config["ssh_keys"]["public_key_path"])
+        self.private_key = None  # paramiko.PKey, parsed once and reused for every connect
+        self._pubkey_cache = None
+        self._pubkey_mtime = 0
+        self._connect_timeout = int(config_manager.config["settings"]["ssh_timeout"])
         
         # Ensure SSH keys exist
         self._ensure_ssh_keys()
+        if self.private_key is None:
+            self.private_key = self._load_private_key()
     
     def _ensure_ssh_keys(self):
         """Ensure SSH keys exist for PasRah"""
@@ -36,31 +59,51 @@ class SSHManager:
     def _generate_ssh_keys(self):
         """Generate new SSH key pair"""
         try:
-            # Generate ed25519 key
-            result = subprocess.run([
-                'ssh-keygen', '-t', 'ed25519', 
-                '-f', str(self.ssh_key_path),
-                '-N', '',  # No passphrase
-                '-C', 'PasRah-SSH-Manager'
-            ], capture_output=True, text=True)
+            # Generate ed25519 key in-process (no passphrase)
+            key = Ed25519PrivateKey.generate()
+            private_bytes = key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.OpenSSH,
+                serialization.NoEncryption()
+            )
+            public_bytes = key.public_key().public_bytes(
+                serialization.Encoding.OpenSSH,
+                serialization.PublicFormat.OpenSSH
+            )
             
-            if result.returncode == 0:
-                # Set proper permissions
-                os.chmod(self.ssh_key_path, 0o600)
-                os.chmod(self.ssh_pub_path, 0o644)
-                print("✅ SSH keys generated successfully")
-                return True
-            else:
-                print(f"❌ Failed to generate SSH keys: {result.stderr}")
-                return False
+            # Create the private key file owner-only from the start
+            fd = os.open(self.ssh_key_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(private_bytes)
+            with open(self.ssh_pub_path, 'w') as f:
+                f.write(f"{public_bytes.decode()} PasRah-SSH-Manager\n")
+            
+            # Set proper permissions
+            os.chmod(self.ssh_key_path, 0o600)
+            os.chmod(self.ssh_pub_path, 0o644)
+            
+            self.private_key = paramiko.Ed25519Key.from_private_key(io.StringIO(private_bytes.decode()))
+            print("✅ SSH keys generated successfully")
+            return True
         except Exception as e:
             print(f"❌ Error generating SSH keys: {e}")
             return False
     
-    def test_connection(self, host: str, port: int, username: str, password: str) -> Tuple[bool, str]:
-        """Test SSH connection to a server"""
+    def _load_private_key(self) -> Optional[paramiko.PKey]:
+        """Load the PasRah private key from disk"""
+        for key_class in (paramiko.Ed25519Key, paramiko.RSAKey):
+            try:
+                return key_class.from_private_key_file(str(self.ssh_key_path))
+            except (paramiko.SSHException, IOError):
+                continue
+        return None
+    
+    def test_connection(self, host: str, port: int, username: str, password: str,
+                        keep_open: bool = False) -> Tuple[bool, str]:
+        """Test SSH connection to a server (keep_open: hold the session for setup_server)"""
+        ssh = paramiko.SSHClient()
+        parked = False
         try:
-            ssh = paramiko.SSHClient()
             ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
             
             start_time = time.time()
@@ -69,28 +112,25 @@ class SSHManager:
                 port=port,
                 username=username,
                 password=password,
-                timeout=self.config_manager.config["settings"]["ssh_timeout"]
+                timeout=self._connect_timeout
             )
             
-            # Test a simple command
-            stdin, stdout, stderr = ssh.exec_command('echo "PasRah Connection Test"')
-            output = stdout.read().decode().strip()
-            
-            ssh.close()
-            
             response_time = round((time.time() - start_time) * 1000, 2)
             
-            if "PasRah Connection Test" in output:
-                self.config_manager.log_event(
-                    "server_logs",
-                    server_id=f"{host}:{port}",
-                    event_type="connect",
-                    message="Connection test successful",
-                    response_time=response_time
-                )
-                return True, f"✅ Connection successful ({response_time}ms)"
-            else:
-                return False, "❌ Command execution failed"
+            # Authentication already proved the credentials; no session
+            # channel is opened just to test the connection
+            if keep_open:
+                self._park_connection((host, port, username), ssh)
+                parked = True
+            
+            self.config_manager.log_event(
+                "server_logs",
+                server_id=f"{host}:{port}",
+                event_type="connect",
+                message="Connection test successful",
+                response_time=response_time
+            )
+            return True, f"✅ Connection successful ({response_time}ms)"
                 
         except paramiko.AuthenticationException:
             return False, "❌ Authentication failed - Invalid credentials"
@@ -100,24 +140,61 @@ class SSHManager:
             return False, "❌ Connection timeout"
         except Exception as e:
             return False, f"❌ Connection failed: {str(e)}"
+        finally:
+            if not parked:
+                ssh.close()
+    
+    def _park_connection(self, key: Tuple[str, int, str], ssh: paramiko.SSHClient):
+        """Hold a tested session for setup_server; closed if unused after PENDING_TTL"""
+        with self.connections_lock:
+            previous = self.pending_connections.pop(key, None)
+            self.pending_connections[key] = ssh
+        if previous is not None and previous is not ssh:
+            previous.close()
+        
+        timer = threading.Timer(self.PENDING_TTL, self._expire_pending, (key, ssh))
+        timer.daemon = True
+        timer.start()
+    
+    def _expire_pending(self, key: Tuple[str, int, str], ssh: paramiko.SSHClient):
+        """Close a parked session that setup_server never picked up"""
+        with self.connections_lock:
+            if self.pending_connections.get(key) is not ssh:
+                return  # Already taken or replaced
+            del self.pending_connections[key]
+        ssh.close()
+    
+    def release_pending(self, host: str, port: int, username: str):
+        """Close the session held by test_connection when setup is abandoned"""
+        with self.connections_lock:
+            ssh = self.pending_connections.pop((host, port, username), None)
+        if ssh is not None:
+            ssh.close()
     
     def setup_server(self, server_id: str, host: str, port: int, username: str, password: str, 
                     options: Dict = None) -> Tuple[bool, str]:
         """Setup a foreign server with SSH key and configuration"""
         options = options or {}
+        ssh = None
         
         try:
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            
-            # Connect to server
-            ssh.connect(
-                hostname=host,
-                port=port,
-                username=username,
-                password=password,
-                timeout=self.config_manager.config["settings"]["ssh_timeout"]
-            )
+            # Reuse the session opened by test_connection if it is still alive
+            with self.connections_lock:
+                ssh = self.pending_connections.pop((host, port, username), None)
+            if not self._is_alive(ssh):
+                if ssh is not None:
+                    ssh.close()
+                ssh = paramiko.SSHClient()
+                ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+                
+                # Connect to server
+                ssh.connect(
+                    hostname=host,
+                    port=port,
+                    username=username,
+                    password=password,
+                    timeout=self._connect_timeout
+                )
             
             setup_steps = []
             
@@ -126,7 +203,6 @@ class SSHManager:
                 setup_steps.append("✅ SSH key copied")
             else:
                 setup_steps.append("❌ Failed to copy SSH key")
-                ssh.close()
                 return False, "\n".join(setup_steps)
             
             # Step 2: Create non-root user if requested
@@ -157,8 +233,6 @@ class SSHManager:
                 else:
                     setup_steps.append("⚠️ SSH hardening failed")
             
-            ssh.close()
-            
             # Update server status
             self.config_manager.update_server_status(server_id, "active")
             self.config_manager.log_event(
@@ -172,40 +246,66 @@ class SSHManager:
             
         except Exception as e:
             return False, f"❌ Server setup failed: {str(e)}"
+        finally:
+            if ssh is not None:
+                ssh.close()
+    
+    def setup_servers(self, configs: List[Dict], max_workers: int = 32) -> Dict[str, Tuple[bool, str]]:
+        """Setup several servers in parallel
+        
+        Each config holds the setup_server arguments: server_id, host, port,
+        username, password and optional options.
+        """
+        if not configs:
+            return {}
+        
+        with ThreadPoolExecutor(max_workers=min(len(configs), max_workers)) as executor:
+            futures = {
+                cfg["server_id"]: executor.submit(self.setup_server, **cfg)
+                for cfg in configs
+            }
+            return {server_id: future.result() for server_id, future in futures.items()}
     
     def _copy_ssh_key(self, ssh: paramiko.SSHClient, username: str) -> bool:
         """Copy SSH public key to remote server"""
         try:
             # Read public key
-            with open(self.ssh_pub_path, 'r') as f:
-                public_key = f.read().strip()
-            
-            # Create .ssh directory and authorized_keys
-            commands = [
-                f"mkdir -p ~/.ssh",
-                f"chmod 700 ~/.ssh",
-                f"echo '{public_key}' >> ~/.ssh/authorized_keys",
-                f"chmod 600 ~/.ssh/authorized_keys",
-                f"sort ~/.ssh/authorized_keys | uniq > ~/.ssh/authorized_keys.tmp",
-                f"mv ~/.ssh/authorized_keys.tmp ~/.ssh/authorized_keys"
-            ]
+            public_key = self._load_pubkey()
             
-            for cmd in commands:
-                stdin, stdout, stderr = ssh.exec_command(cmd)
-                if stderr.channel.recv_exit_status() != 0:
-                    error = stderr.read().decode().strip()
-                    if error:  # Only log if there's actual error content
-                        print(f"Warning in SSH key setup: {error}")
+            # Use SFTP on the existing transport (paths are relative to home)
+            sftp = ssh.open_sftp()
+            try:
+                # Create .ssh directory
+                try:
+                    sftp.mkdir(".ssh", mode=0o700)
+                except IOError:
+                    pass  # Already exists
+                sftp.chmod(".ssh", 0o700)
+                
+                # Append the key unless it is already authorized
+                try:
+                    with sftp.open(".ssh/authorized_keys", "r") as f:
+                        existing = f.read().decode()
+                except IOError:
+                    existing = ""
+                
+                if public_key not in (line.strip() for line in existing.splitlines()):
+                    separator = "" if not existing or existing.endswith("\n") else "\n"
+                    with sftp.open(".ssh/authorized_keys", "a") as f:
+                        f.write(f"{separator}{public_key}\n")
+                
+                sftp.chmod(".ssh/authorized_keys", 0o600)
+            finally:
+                sftp.close()
             
-            # Test key-based authentication
-            return self._test_key_auth(ssh.get_transport().getpeername()[0], username)
+            return True
             
         except Exception as e:
             print(f"Error copying SSH key: {e}")
             return False
     
     def _test_key_auth(self, host: str, username: str) -> bool:
-        """Test SSH key-based authentication"""
+        """Test SSH key-based authentication with a fresh connection (explicit verify only)"""
         try:
             ssh = paramiko.SSHClient()
             ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
@@ -213,8 +313,10 @@ class SSHManager:
             ssh.connect(
                 hostname=host,
                 username=username,
-                key_filename=str(self.ssh_key_path),
-                timeout=10
+                pkey=self.private_key,
+                key_filename=None if self.private_key else str(self.ssh_key_path),
+                timeout=10,
+                **self.KEY_CONNECT_OPTIONS
             )
             
             stdin, stdout, stderr = ssh.exec_command('echo "Key auth test"')
@@ -228,63 +330,51 @@ class SSHManager:
     def _create_pasrah_user(self, ssh: paramiko.SSHClient) -> bool:
         """Create a dedicated PasRah user"""
         try:
-            commands = [
-                "useradd -m -s /bin/bash pasrah",
-                "usermod -aG sudo pasrah",
-                "mkdir -p /home/pasrah/.ssh",
-                "cp ~/.ssh/authorized_keys /home/pasrah/.ssh/",
-                "chown -R pasrah:pasrah /home/pasrah/.ssh",
-                "chmod 700 /home/pasrah/.ssh",
-                "chmod 600 /home/pasrah/.ssh/authorized_keys"
-            ]
-            
-            for cmd in commands:
-                stdin, stdout, stderr = ssh.exec_command(cmd)
-                exit_status = stderr.channel.recv_exit_status()
-                if exit_status != 0:
-                    error = stderr.read().decode().strip()
-                    # User might already exist, that's ok
-                    if "already exists" not in error and error:
-                        return False
-            
-            return True
+            # User might already exist, that's ok
+            script = """
+id -u pasrah >/dev/null 2>&1 || useradd -m -s /bin/bash pasrah
+usermod -aG sudo pasrah
+mkdir -p /home/pasrah/.ssh
+cp ~/.ssh/authorized_keys /home/pasrah/.ssh/
+chown -R pasrah:pasrah /home/pasrah/.ssh
+chmod 700 /home/pasrah/.ssh
+chmod 600 /home/pasrah/.ssh/authorized_keys
+"""
+            exit_status, _, _ = self._run_script(ssh, script)
+            return exit_status == 0
         except:
             return False
     
     def _update_system(self, ssh: paramiko.SSHClient) -> bool:
         """Update system packages"""
         try:
-            # Detect package manager and update
-            stdin, stdout, stderr = ssh.exec_command("which apt-get")
-            if stdout.channel.recv_exit_status() == 0:
-                # Ubuntu/Debian
-                update_cmd = "apt-get update && apt-get upgrade -y"
-            else:
-                # CentOS/RHEL
-                update_cmd = "yum update -y"
-            
-            stdin, stdout, stderr = ssh.exec_command(update_cmd, timeout=300)
-            return stderr.channel.recv_exit_status() == 0
+            # Detect package manager and update (Ubuntu/Debian, else CentOS/RHEL)
+            script = """
+if command -v apt-get >/dev/null 2>&1; then
+    apt-get update && apt-get upgrade -y
+else
+    yum update -y
+fi
+"""
+            exit_status, _, _ = self._run_script(ssh, script)
+            return exit_status == 0
         except:
             return False
     
     def _install_fail2ban(self, ssh: paramiko.SSHClient) -> bool:
         """Install and configure fail2ban"""
         try:
-            # Detect package manager and install
-            stdin, stdout, stderr = ssh.exec_command("which apt-get")
-            if stdout.channel.recv_exit_status() == 0:
-                install_cmd = "apt-get install -y fail2ban"
-            else:
-                install_cmd = "yum install -y fail2ban"
-            
-            stdin, stdout, stderr = ssh.exec_command(install_cmd)
-            if stderr.channel.recv_exit_status() != 0:
-                return False
-            
-            # Enable and start fail2ban
-            stdin, stdout, stderr = ssh.exec_command("systemctl enable fail2ban && systemctl start fail2ban")
-            return stderr.channel.recv_exit_status() == 0
+            # Detect package manager, install, then enable and start fail2ban
+            script = """
+if command -v apt-get >/dev/null 2>&1; then
+    apt-get install -y fail2ban
+else
+    yum install -y fail2ban
+fi
+systemctl enable fail2ban && systemctl start fail2ban
+"""
+            exit_status, _, _ = self._run_script(ssh, script)
+            return exit_status == 0
         except:
             return False
     
@@ -293,8 +383,6 @@ class SSHManager:
         try:
             hardening_config = """
 # PasRah SSH Hardening
-PermitRootLogin yes
-PasswordAuthentication yes
 PubkeyAuthentication yes
 AuthorizedKeysFile .ssh/authorized_keys
 PermitEmptyPasswords no
@@ -308,19 +396,67 @@ ClientAliveCountMax 3
 MaxStartups 10:30:100
 """
             
-            # Backup original config
-            stdin, stdout, stderr = ssh.exec_command("cp /etc/ssh/sshd_config /etc/ssh/sshd_config.backup")
-            
-            # Apply hardening (append to avoid breaking existing config)
-            stdin, stdout, stderr = ssh.exec_command(f"echo '{hardening_config}' >> /etc/ssh/sshd_config")
-            
-            # Restart SSH service
-            stdin, stdout, stderr = ssh.exec_command("systemctl restart ssh || systemctl restart sshd")
-            
-            return stderr.channel.recv_exit_status() == 0
+            # Write hardening as a drop-in file over SFTP (no shell quoting)
+            dropin_dir = "/etc/ssh/sshd_config.d"
+            dropin_path = f"{dropin_dir}/99-pasrah.conf"
+            sftp = ssh.open_sftp()
+            try:
+                try:
+                    sftp.mkdir(dropin_dir, mode=0o755)
+                except IOError:
+                    pass  # Already exists
+                with sftp.open(dropin_path, "w") as f:
+                    f.write(hardening_config)
+                sftp.chmod(dropin_path, 0o644)
+            finally:
+                sftp.close()
+            
+            # Make sure sshd reads drop-ins (older configs lack the Include),
+            # validate, roll back on error and reload SSH service. The Include
+            # goes first (so it is never inside a Match block), which lets the
+            # drop-in win over sshd_config; it must not touch login policy.
+            script = f"""
+cp /etc/ssh/sshd_config /etc/ssh/sshd_config.backup
+grep -q '^Include {dropin_dir}/' /etc/ssh/sshd_config || sed -i '1i Include {dropin_dir}/*.conf' /etc/ssh/sshd_config
+if ! "$(command -v sshd || echo /usr/sbin/sshd)" -t; then
+    rm -f {dropin_path}
+    cp /etc/ssh/sshd_config.backup /etc/ssh/sshd_config
+    exit 1
+fi
+systemctl reload ssh || systemctl reload sshd
+"""
+            exit_status, _, _ = self._run_script(ssh, script)
+            return exit_status == 0
         except:
             return False
     
+    def _is_alive(self, ssh: Optional[paramiko.SSHClient]) -> bool:
+        """Check whether an SSH client still has an active transport"""
+        if ssh is None:
+            return False
+        transport = ssh.get_transport()
+        return transport is not None and transport.is_active()
+    
+    def get_connection(self, server_id: str) -> Optional[paramiko.SSHClient]:
+        """Return the pooled connection for a server, reconnecting if it dropped"""
+        # Per-server lock: concurrent callers share one reconnect, and a slow
+        # handshake to one server doesn't hold up the others
+        with self.connections_lock:
+            server_lock = self._server_locks.setdefault(server_id, threading.Lock())
+        
+        with server_lock:
+            with self.connections_lock:
+                ssh = self.ssh_connections.get(server_id)
+            if self._is_alive(ssh):
+                return ssh
+            if ssh is not None:
+                # Drop the dead client before replacing it
+                with self.connections_lock:
+                    if self.ssh_connections.get(server_id) is ssh:
+                        del self.ssh_connections[server_id]
+                ssh.close()
+            return self.connect_with_key(server_id)
+    
     def connect_with_key(self, server_id: str) -> Optional[paramiko.SSHClient]:
         """Connect to server using SSH key"""
         server = self.config_manager.get_server(server_id)
@@ -335,11 +471,20 @@ MaxStartups 10:30:100
                 hostname=server["host"],
                 port=server["port"],
                 username=server["username"],
-                key_filename=str(self.ssh_key_path),
-                timeout=self.config_manager.config["settings"]["ssh_timeout"]
+                pkey=self.private_key,
+                key_filename=None if self.private_key else str(self.ssh_key_path),
+                timeout=self._connect_timeout,
+                **self.KEY_CONNECT_OPTIONS
             )
             
-            self.ssh_connections[server_id] = ssh
+            # Keep pooled connections alive through NAT/firewall idle timeouts
+            ssh.get_transport().set_keepalive(30)
+            
+            with self.connections_lock:
+                previous = self.ssh_connections.get(server_id)
+                self.ssh_connections[server_id] = ssh
+            if previous is not None and previous is not ssh:
+                previous.close()  # Dead or superseded; release its socket and thread
             self.config_manager.update_server_status(server_id, "connected")
             
             return ssh
@@ -355,66 +500,87 @@ MaxStartups 10:30:100
     
     def disconnect(self, server_id: str):
         """Disconnect from server"""
-        if server_id in self.ssh_connections:
+        with self.connections_lock:
+            ssh = self.ssh_connections.pop(server_id, None)
+        if ssh:
             try:
-                self.ssh_connections[server_id].close()
-                del self.ssh_connections[server_id]
+                ssh.close()
                 self.config_manager.update_server_status(server_id, "disconnected")
             except:
                 pass
     
-    def execute_command(self, server_id: str, command: str) -> Tuple[bool, str, str]:
-        """Execute command on remote server"""
-        ssh = self.ssh_connections.get(server_id)
+    def execute_command(self, server_id: str, command: str,
+                        output_limit: int = 64 * 1024) -> Tuple[bool, str, str]:
+        """Execute command on remote server (keeps at most output_limit bytes of output)"""
+        ssh = self.get_connection(server_id)
         if not ssh:
-            ssh = self.connect_with_key(server_id)
-            if not ssh:
-                return False, "", "Not connected to server"
+            return False, "", "Not connected to server"
         
         try:
             stdin, stdout, stderr = ssh.exec_command(command, timeout=30)
-            output = stdout.read().decode().strip()
-            error = stderr.read().decode().strip()
-            exit_status = stderr.channel.recv_exit_status()
+            channel = stdout.channel
+            try:
+                output, error = self._read_bounded(channel, output_limit)
+                exit_status = channel.recv_exit_status()
+            finally:
+                channel.close()
             
             return exit_status == 0, output, error
         except Exception as e:
             return False, "", str(e)
     
+    def _read_bounded(self, channel: paramiko.Channel, output_limit: int) -> Tuple[str, str]:
+        """Drain stdout and stderr of a channel, keeping at most output_limit bytes of each"""
+        buffers = []
+        for recv in (channel.recv, channel.recv_stderr):
+            buf = bytearray()
+            while True:
+                data = recv(4096)
+                if not data:
+                    break
+                if len(buf) < output_limit:
+                    buf += data[:output_limit - len(buf)]
+            buffers.append(buf.decode(errors="replace").strip())
+        return buffers[0], buffers[1]
+    
     def check_server_health(self, server_id: str) -> Dict:
         """Check server health and gather system info"""
-        ssh = self.connect_with_key(server_id)
+        ssh = self.get_connection(server_id)
         if not ssh:
             return {"status": "unreachable", "error": "Cannot connect"}
         
         health_data = {"status": "healthy", "metrics": {}}
         
+        metric_commands = {
+            "uptime": "uptime",             # System uptime
+            "memory": "free -h",            # Memory usage
+            "disk": "df -h /",              # Disk usage
+            "load": "cat /proc/loadavg"     # CPU load
+        }
+        
+        def timed_ping():
+            start_time = time.time()
+            success, _ = self._run(ssh, "ping -c 1 8.8.8.8")
+            return success, round((time.time() - start_time) * 1000, 2)
+        
         try:
-            # System uptime
-            success, output, _ = self.execute_command(server_id, "uptime")
-            if success:
-                health_data["metrics"]["uptime"] = output
-            
-            # Memory usage
-            success, output, _ = self.execute_command(server_id, "free -h")
-            if success:
-                health_data["metrics"]["memory"] = output
-            
-            # Disk usage
-            success, output, _ = self.execute_command(server_id, "df -h /")
-            if success:
-                health_data["metrics"]["disk"] = output
-            
-            # CPU load
-            success, output, _ = self.execute_command(server_id, "cat /proc/loadavg")
-            if success:
-                health_data["metrics"]["load"] = output
+            # Each command gets its own channel on the shared transport
+            with ThreadPoolExecutor(max_workers=len(metric_commands) + 1) as executor:
+                futures = {
+                    name: executor.submit(self._run, ssh, command)
+                    for name, command in metric_commands.items()
+                }
+                ping_future = executor.submit(timed_ping)
+                
+                for name, future in futures.items():
+                    success, output = future.result()
+                    if success:
+                        health_data["metrics"][name] = output
+                
+                # Network connectivity
+                success, response_time = ping_future.result()
             
-            # Network connectivity
-            start_time = time.time()
-            success, output, _ = self.execute_command(server_id, "ping -c 1 8.8.8.8")
             if success:
-                response_time = round((time.time() - start_time) * 1000, 2)
                 health_data["metrics"]["network"] = f"OK ({response_time}ms)"
             else:
                 health_data["metrics"]["network"] = "Failed"
@@ -426,13 +592,51 @@ MaxStartups 10:30:100
         
         return health_data
     
+    def check_servers_health(self, server_ids: List[str]) -> Dict[str, Dict]:
+        """Check health of several servers concurrently"""
+        if not server_ids:
+            return {}
+        
+        with ThreadPoolExecutor(max_workers=min(len(server_ids), 16)) as executor:
+            futures = {
+                server_id: executor.submit(self.check_server_health, server_id)
+                for server_id in server_ids
+            }
+            return {server_id: future.result() for server_id, future in futures.items()}
+    
+    def _run(self, ssh: paramiko.SSHClient, command: str) -> Tuple[bool, str]:
+        """Run a command on an open connection and return (success, stdout)"""
+        stdin, stdout, stderr = ssh.exec_command(command, timeout=30)
+        output, _ = self._read_bounded(stdout.channel, 64 * 1024)
+        return stdout.channel.recv_exit_status() == 0, output
+    
+    def _run_script(self, ssh: paramiko.SSHClient, script: str) -> Tuple[int, str, str]:
+        """Run a shell script on one channel; stops at the first failing command"""
+        # No channel timeout: apt/yum can stay silent for minutes while the
+        # script is still making progress, and recv() would give up on it
+        stdin, stdout, stderr = ssh.exec_command("bash -s")
+        stdin.write("set -e\n" + script)
+        stdin.channel.shutdown_write()
+        
+        # Package manager scripts can print megabytes; keep only the head
+        output, error = self._read_bounded(stdout.channel, 64 * 1024)
+        return stdout.channel.recv_exit_status(), output, error
+    
     def get_public_key(self) -> str:
         """Get the public key content"""
         try:
-            with open(self.ssh_pub_path, 'r') as f:
-                return f.read().strip()
+            return self._load_pubkey()
         except:
             return ""
+    
+    def _load_pubkey(self) -> str:
+        """Read the public key, re-reading the file only when it changed"""
+        mtime = os.stat(self.ssh_pub_path).st_mtime
+        if self._pubkey_cache is None or mtime != self._pubkey_mtime:
+            with open(self.ssh_pub_path, 'r') as f:
+                self._pubkey_cache = f.read().strip()
+            self._pubkey_mtime = mtime
+        return self._pubkey_cache
 
 # Example usage
 if __name__ == "__main__":
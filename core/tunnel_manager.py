@@ -11,18 +11,61 @@ import socket
 import threading
 import signal
 import os
+import re
+import errno
+import tempfile
+import selectors
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
+from enum import IntEnum
 import json
 
+# Log message template, bound once instead of re-parsing an f-string per call
+_LOG_TUNNEL_CREATED = "{} tunnel created: {}:{} -> {}:{}".format
+
+class TunnelKind(IntEnum):
+    """Type of an active tunnel, resolved once at creation"""
+    TCP = 0
+    UDP = 1
+
 class TunnelManager:
+    # Larger transfer blocks and UDP socket buffers for the socat bridges, so
+    # bursts aren't dropped at the default 8 KB (the kernel caps to rmem_max).
+    # Both bridges send each block as one datagram, so it stays within the
+    # largest UDP payload (65507); anything bigger fails with EMSGSIZE.
+    SOCAT_BLOCK_SIZE = "65507"
+    SOCAT_UDP_BUFFERS = "rcvbuf=4194304,sndbuf=4194304"
+    
     def __init__(self, config_manager, ssh_manager):
         self.config_manager = config_manager
         self.ssh_manager = ssh_manager
         self.active_tunnels = {}  # tunnel_id -> process info
+        self._lock = threading.RLock()  # Guards active_tunnels mutations
         self.monitoring_thread = None
         self.monitoring_active = False
         
+        # SSH options shared by every tunnel process
+        self._ssh_base_opts = (
+            "-N",  # No command execution
+            "-o", "ServerAliveInterval=30",
+            "-o", "ServerAliveCountMax=3",
+            "-o", "ExitOnForwardFailure=yes",
+            "-o", "TCPKeepAlive=yes",
+            "-o", "Compression=no",  # Compression only adds latency to small packets
+            "-o", "StrictHostKeyChecking=no",
+            "-o", "UserKnownHostsFile=/dev/null"
+        )
+        self._ssh_key_path = self.config_manager.config["ssh_keys"]["private_key_path"]
+        self._check_interval = self.config_manager.config["settings"]["tunnel_check_interval"]
+        self._reach_cache = {}  # (host, port) -> (checked_at, result)
+        self._bw_batch = []  # bandwidth rows written once per monitor cycle
+        self._conn_counters = {}  # (local, peer) -> (bytes_in, bytes_out) at last sample
+        self._wake_monitor = threading.Event()
+        self._exit_selector = self._create_exit_selector()
+        if self._exit_selector is None:
+            self._install_sigchld_handler()
+        
         # Start monitoring thread
         self.start_monitoring()
     
@@ -56,41 +99,36 @@ class TunnelManager:
         except Exception as e:
             return False, f"❌ Failed to create tunnel: {str(e)}"
     
+    def _build_ssh_cmd(self, forward_spec: str, server: Dict) -> List[str]:
+        """Build the ssh command line for a local port forward"""
+        return [
+            "ssh",
+            *self._ssh_base_opts,
+            "-L", forward_spec,
+            "-i", self._ssh_key_path,
+            "-p", str(server["port"]),
+            f"{server['username']}@{server['host']}"
+        ]
+    
     def _create_tcp_tunnel(self, tunnel_id: str, tunnel: Dict, server: Dict, bind_address: str) -> Tuple[bool, str]:
         """Create a TCP SSH tunnel"""
         try:
             # Build SSH command
-            ssh_key_path = self.config_manager.config["ssh_keys"]["private_key_path"]
-            
-            ssh_cmd = [
-                "ssh",
-                "-N",  # No command execution
-                "-L", f"{bind_address}:{tunnel['local_port']}:{tunnel['remote_host']}:{tunnel['remote_port']}",
-                "-o", "ServerAliveInterval=30",
-                "-o", "ServerAliveCountMax=3",
-                "-o", "ExitOnForwardFailure=yes",
-                "-o", "StrictHostKeyChecking=no",
-                "-o", "UserKnownHostsFile=/dev/null",
-                "-i", ssh_key_path,
-                "-p", str(server["port"]),
-                f"{server['username']}@{server['host']}"
-            ]
+            ssh_cmd = self._build_ssh_cmd(
+                f"{bind_address}:{tunnel['local_port']}:{tunnel['remote_host']}:{tunnel['remote_port']}",
+                server
+            )
             
             # Start SSH tunnel process
-            process = subprocess.Popen(
-                ssh_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                preexec_fn=os.setsid  # Create new process group
-            )
+            process = self._spawn(ssh_cmd)
             
-            # Wait a moment and check if process is still running
-            time.sleep(2)
+            # Wait for the forward to start listening (returns early if ssh exits)
+            port_ready = self._wait_for_port(tunnel["local_port"], timeout=10, process=process)
             
             if process.poll() is None:
                 # Process is running, check if port is listening
-                if self._wait_for_port(tunnel["local_port"], timeout=10):
-                    self.active_tunnels[tunnel_id] = {
+                if port_ready:
+                    tunnel_info = {
                         "process": process,
                         "pid": process.pid,
                         "started_at": time.time(),
@@ -98,10 +136,12 @@ class TunnelManager:
                         "remote_host": tunnel["remote_host"],
                         "remote_port": tunnel["remote_port"],
                         "server_id": tunnel["server_id"],
-                        "tunnel_type": "tcp",
+                        "kind": TunnelKind.TCP,
                         "bytes_sent": 0,
                         "bytes_received": 0
                     }
+                    with self._lock:
+                        self.active_tunnels[tunnel_id] = tunnel_info
                     
                     # Update config
                     self.config_manager.update_tunnel_status(tunnel_id, "active", process.pid)
@@ -111,7 +151,7 @@ class TunnelManager:
                         "tunnel_logs",
                         tunnel_id=tunnel_id,
                         event_type="connect",
-                        message=f"TCP tunnel created: {bind_address}:{tunnel['local_port']} -> {server['host']}:{tunnel['remote_port']}"
+                        message=_LOG_TUNNEL_CREATED("TCP", bind_address, tunnel['local_port'], server['host'], tunnel['remote_port'])
                     )
                     
                     return True, f"✅ TCP tunnel created successfully on port {tunnel['local_port']}"
@@ -121,7 +161,8 @@ class TunnelManager:
                     return False, f"❌ TCP tunnel failed to bind to port {tunnel['local_port']}"
             else:
                 # Process died immediately
-                stderr_output = process.stderr.read().decode() if process.stderr else ""
+                stderr_output = self._read_stderr(process)
+                self._close_stderr(process)
                 return False, f"❌ TCP tunnel process failed: {stderr_output}"
                 
         except Exception as e:
@@ -129,129 +170,79 @@ class TunnelManager:
     
     def _create_udp_tunnel(self, tunnel_id: str, tunnel: Dict, server: Dict, bind_address: str) -> Tuple[bool, str]:
         """Create a UDP tunnel using socat bridges"""
+        remote_process = None
         try:
-            # First ensure socat is installed on remote server
-            ssh = self.ssh_manager.connect_with_key(tunnel["server_id"])
+            # Shared per-server connection; it outlives this tunnel
+            ssh = self.ssh_manager.get_connection(tunnel["server_id"])
             if not ssh:
                 return False, "❌ Cannot connect to remote server"
             
-            # Install socat if not present
-            install_success = self._ensure_socat_installed(ssh)
-            if not install_success:
-                return False, "❌ Failed to install socat on remote server"
-            
-            # Find available intermediate TCP port on remote server
-            intermediate_port = self._find_available_port(ssh, 10000, 20000)
-            if not intermediate_port:
-                return False, "❌ Cannot find available intermediate port on remote server"
-            
-            # Step 1: Create remote socat bridge (TCP -> UDP)
-            remote_socat_cmd = f"socat TCP-LISTEN:{intermediate_port},fork,reuseaddr UDP:{tunnel['remote_host']}:{tunnel['remote_port']}"
-            
-            remote_process = self._start_remote_process(ssh, remote_socat_cmd)
-            if not remote_process:
-                return False, "❌ Failed to start remote socat bridge"
-            
-            # Step 2: Create SSH tunnel for the intermediate TCP connection
-            ssh_key_path = self.config_manager.config["ssh_keys"]["private_key_path"]
-            
-            ssh_cmd = [
-                "ssh",
-                "-N",
-                "-L", f"{bind_address}:{tunnel['local_port']}:localhost:{intermediate_port}",
-                "-o", "ServerAliveInterval=30",
-                "-o", "ServerAliveCountMax=3",
-                "-o", "ExitOnForwardFailure=yes",
-                "-o", "StrictHostKeyChecking=no",
-                "-o", "UserKnownHostsFile=/dev/null",
-                "-i", ssh_key_path,
-                "-p", str(server["port"]),
-                f"{server['username']}@{server['host']}"
-            ]
-            
-            ssh_process = subprocess.Popen(
-                ssh_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                preexec_fn=os.setsid
+            # Step 1: Create remote socat bridge (TCP -> UDP) on a free
+            # intermediate port, installing socat first if needed
+            remote_process, error = self._start_remote_bridge(
+                ssh, tunnel['remote_host'], tunnel['remote_port'], 10000, 20000
             )
+            if not remote_process:
+                return False, error
+            intermediate_port = remote_process["port"]
             
-            time.sleep(2)
-            
-            if ssh_process.poll() is not None:
-                return False, "❌ SSH tunnel process failed"
-            
-            # Step 3: Create local socat bridge (UDP -> TCP)
-            local_socat_cmd = [
-                "socat",
-                f"UDP-LISTEN:{tunnel['local_port']},fork,reuseaddr",
-                f"TCP:127.0.0.1:{tunnel['local_port']}"
-            ]
-            
-            # We need to use a different local port for the socat connection
+            # Step 2: Create SSH tunnel for the intermediate TCP connection,
+            # on a separate local TCP port since the UDP port is socat's
             local_tcp_port = self._find_local_available_port(tunnel['local_port'] + 1000, tunnel['local_port'] + 2000)
             if not local_tcp_port:
-                self._kill_process(ssh_process)
+                self._kill_remote_bridge(tunnel["server_id"], remote_process["pid"])
                 return False, "❌ Cannot find available local TCP port"
             
-            # Update SSH tunnel to use the local TCP port
-            self._kill_process(ssh_process)
-            
-            # Restart SSH tunnel with correct local TCP port
-            ssh_cmd[2] = f"{bind_address}:{local_tcp_port}:localhost:{intermediate_port}"
-            
-            ssh_process = subprocess.Popen(
-                ssh_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                preexec_fn=os.setsid
+            ssh_cmd = self._build_ssh_cmd(
+                f"{bind_address}:{local_tcp_port}:localhost:{intermediate_port}",
+                server
             )
             
-            time.sleep(2)
+            ssh_process = self._spawn(ssh_cmd)
             
-            if ssh_process.poll() is not None:
-                return False, "❌ SSH tunnel process failed on retry"
+            if not self._wait_for_port(local_tcp_port, timeout=10, process=ssh_process):
+                if ssh_process.poll() is None:
+                    self._kill_process(ssh_process)
+                self._kill_remote_bridge(tunnel["server_id"], remote_process["pid"])
+                return False, "❌ SSH tunnel process failed"
             
-            # Now create local socat bridge
+            # Step 3: Create local socat bridge (UDP -> TCP)
             local_socat_cmd = [
-                "socat",
-                f"UDP-LISTEN:{tunnel['local_port']},fork,reuseaddr",
-                f"TCP:127.0.0.1:{local_tcp_port}"
+                "socat", "-b", self.SOCAT_BLOCK_SIZE,
+                f"UDP-LISTEN:{tunnel['local_port']},fork,reuseaddr,{self.SOCAT_UDP_BUFFERS}",
+                f"TCP:127.0.0.1:{local_tcp_port},nodelay"  # Don't let Nagle hold datagrams
             ]
             
-            local_socat_process = subprocess.Popen(
-                local_socat_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                preexec_fn=os.setsid
-            )
+            local_socat_process = self._spawn(local_socat_cmd)
             
-            time.sleep(1)
-            
-            if local_socat_process.poll() is not None:
+            if not self._wait_for_udp_bind(tunnel['local_port'], timeout=5, process=local_socat_process):
+                self._kill_process(local_socat_process)
                 self._kill_process(ssh_process)
+                self._kill_remote_bridge(tunnel["server_id"], remote_process["pid"])
                 return False, "❌ Local socat bridge failed"
             
             # Store all processes for this UDP tunnel
-            self.active_tunnels[tunnel_id] = {
+            tunnel_info = {
                 "ssh_process": ssh_process,
                 "local_socat_process": local_socat_process,
                 "remote_process_info": remote_process,
-                "ssh_connection": ssh,
                 "pid": ssh_process.pid,
                 "started_at": time.time(),
                 "local_port": tunnel["local_port"],
                 "remote_host": tunnel["remote_host"],
                 "remote_port": tunnel["remote_port"],
                 "server_id": tunnel["server_id"],
-                "tunnel_type": "udp",
+                "kind": TunnelKind.UDP,
                 "intermediate_port": intermediate_port,
                 "local_tcp_port": local_tcp_port,
                 "bytes_sent": 0,
                 "bytes_received": 0
             }
+            with self._lock:
+                self.active_tunnels[tunnel_id] = tunnel_info
             
-            # Update config
+            # Update config (helpers first, so the process table row includes them)
+            self.config_manager.set_tunnel_helper_pids(tunnel_id, [local_socat_process.pid])
             self.config_manager.update_tunnel_status(tunnel_id, "active", ssh_process.pid)
             
             # Log event
@@ -259,81 +250,74 @@ class TunnelManager:
                 "tunnel_logs",
                 tunnel_id=tunnel_id,
                 event_type="connect",
-                message=f"UDP tunnel created: {bind_address}:{tunnel['local_port']} -> {server['host']}:{tunnel['remote_port']}"
+                message=_LOG_TUNNEL_CREATED("UDP", bind_address, tunnel['local_port'], server['host'], tunnel['remote_port'])
             )
             
             return True, f"✅ UDP tunnel created successfully on port {tunnel['local_port']}"
             
         except Exception as e:
+            if remote_process:
+                self._kill_remote_bridge(tunnel["server_id"], remote_process["pid"])
             return False, f"❌ Failed to create UDP tunnel: {str(e)}"
     
-    def _ensure_socat_installed(self, ssh) -> bool:
-        """Ensure socat is installed on remote server"""
+    def _start_remote_bridge(self, ssh, remote_host: str, remote_port: int,
+                             start_port: int, end_port: int) -> Tuple[Optional[Dict], str]:
+        """Install socat, pick a free port and start the remote bridge in one exec"""
+        command = (
+            f"socat -b {self.SOCAT_BLOCK_SIZE} TCP-LISTEN:$PORT,fork,reuseaddr,nodelay "
+            f"UDP:{remote_host}:{remote_port},{self.SOCAT_UDP_BUFFERS}"
+        )
+        script = f"""
+if ! command -v socat >/dev/null 2>&1; then
+    if command -v apt-get >/dev/null 2>&1; then
+        (apt-get update && apt-get install -y socat) >/dev/null 2>&1
+    else
+        (yum install -y socat || dnf install -y socat) >/dev/null 2>&1
+    fi
+    command -v socat >/dev/null 2>&1 || {{ echo socat; exit 1; }}
+fi
+PORT=$( (ss -ltnH 2>/dev/null || netstat -ltn) | awk -v s={start_port} -v e={end_port} '
+    {{ for (i = 1; i <= NF; i++) if (match($i, /:[0-9]+$/)) used[substr($i, RSTART + 1)] = 1 }}
+    END {{ for (p = s; p < e; p++) if (!(p in used)) {{ print p; exit }} }}')
+[ -n "$PORT" ] || {{ echo port; exit 1; }}
+nohup {command} > /dev/null 2>&1 &
+echo "$PORT $!"
+"""
         try:
-            # Check if socat exists
-            stdin, stdout, stderr = ssh.exec_command("which socat")
-            if stdout.channel.recv_exit_status() == 0:
-                return True
+            stdin, stdout, stderr = ssh.exec_command(script)
+            output = stdout.read().decode().split()
             
-            # Try to install socat
-            stdin, stdout, stderr = ssh.exec_command("which apt-get")
-            if stdout.channel.recv_exit_status() == 0:
-                # Ubuntu/Debian
-                install_cmd = "apt-get update && apt-get install -y socat"
-            else:
-                # CentOS/RHEL
-                install_cmd = "yum install -y socat || dnf install -y socat"
-            
-            stdin, stdout, stderr = ssh.exec_command(install_cmd)
-            return stderr.channel.recv_exit_status() == 0
+            if output == ["socat"]:
+                return None, "❌ Failed to install socat on remote server"
+            if output == ["port"]:
+                return None, "❌ Cannot find available intermediate port on remote server"
+            if len(output) == 2 and all(part.isdigit() for part in output):
+                port, pid = int(output[0]), int(output[1])
+                return {"pid": pid, "port": port, "command": command.replace("$PORT", str(port))}, ""
             
-        except:
-            return False
-    
-    def _find_available_port(self, ssh, start_port: int, end_port: int) -> Optional[int]:
-        """Find an available port on remote server"""
-        try:
-            for port in range(start_port, end_port):
-                stdin, stdout, stderr = ssh.exec_command(f"netstat -ln | grep :{port}")
-                if stdout.channel.recv_exit_status() != 0:  # Port not in use
-                    return port
-            return None
-        except:
-            return None
+            return None, "❌ Failed to start remote socat bridge"
+        except Exception as e:
+            return None, f"❌ Failed to start remote socat bridge: {str(e)}"
     
     def _find_local_available_port(self, start_port: int, end_port: int) -> Optional[int]:
         """Find an available port on local machine"""
+        used = self._snapshot_listening_ports() or set()
         for port in range(start_port, end_port):
-            if not self._is_port_in_use(port):
+            # Snapshot skips known listeners; the bind test closes the race
+            if port not in used and not self._is_port_in_use(port):
                 return port
         return None
     
-    def _start_remote_process(self, ssh, command: str) -> Optional[Dict]:
-        """Start a background process on remote server"""
-        try:
-            # Start process in background and get PID
-            bg_command = f"nohup {command} > /dev/null 2>&1 & echo $!"
-            stdin, stdout, stderr = ssh.exec_command(bg_command)
-            
-            pid_output = stdout.read().decode().strip()
-            if pid_output.isdigit():
-                pid = int(pid_output)
-                return {"pid": pid, "command": command}
-            
-            return None
-        except:
-            return None
-    
     def destroy_tunnel(self, tunnel_id: str) -> Tuple[bool, str]:
         """Destroy an SSH tunnel (TCP or UDP)"""
-        if tunnel_id not in self.active_tunnels:
+        # Remove before killing, so the monitor never sees the exit as a crash
+        with self._lock:
+            tunnel_info = self.active_tunnels.pop(tunnel_id, None)
+        if tunnel_info is None:
             return False, "❌ Tunnel is not active"
         
         try:
-            tunnel_info = self.active_tunnels[tunnel_id]
-            tunnel_type = tunnel_info.get("tunnel_type", "tcp")
-            
-            if tunnel_type == "udp":
+            if tunnel_info["kind"] is TunnelKind.UDP:
                 return self._destroy_udp_tunnel(tunnel_id, tunnel_info)
             else:
                 return self._destroy_tcp_tunnel(tunnel_id, tunnel_info)
@@ -349,9 +333,6 @@ class TunnelManager:
             # Kill the process group
             self._kill_process(process)
             
-            # Remove from active tunnels
-            del self.active_tunnels[tunnel_id]
-            
             # Update config
             self.config_manager.update_tunnel_status(tunnel_id, "inactive", None)
             
@@ -371,34 +352,11 @@ class TunnelManager:
     def _destroy_udp_tunnel(self, tunnel_id: str, tunnel_info: Dict) -> Tuple[bool, str]:
         """Destroy a UDP tunnel"""
         try:
-            # Kill local socat process
-            if "local_socat_process" in tunnel_info:
-                self._kill_process(tunnel_info["local_socat_process"])
-            
-            # Kill SSH process
-            if "ssh_process" in tunnel_info:
-                self._kill_process(tunnel_info["ssh_process"])
-            
-            # Kill remote socat process
-            if "remote_process_info" in tunnel_info and "ssh_connection" in tunnel_info:
-                try:
-                    ssh = tunnel_info["ssh_connection"]
-                    remote_pid = tunnel_info["remote_process_info"]["pid"]
-                    ssh.exec_command(f"kill {remote_pid}")
-                except:
-                    pass  # Best effort
-            
-            # Close SSH connection
-            if "ssh_connection" in tunnel_info:
-                try:
-                    tunnel_info["ssh_connection"].close()
-                except:
-                    pass
-            
-            # Remove from active tunnels
-            del self.active_tunnels[tunnel_id]
+            # Local socat, SSH process and the remote socat bridge
+            self._release_processes(tunnel_info)
             
             # Update config
+            self.config_manager.set_tunnel_helper_pids(tunnel_id, [])
             self.config_manager.update_tunnel_status(tunnel_id, "inactive", None)
             
             # Log event
@@ -414,44 +372,54 @@ class TunnelManager:
         except Exception as e:
             return False, f"❌ Failed to destroy UDP tunnel: {str(e)}"
     
+    def destroy_all_tunnels(self) -> List[Tuple[bool, str]]:
+        """Destroy every active tunnel in parallel"""
+        with self._lock:
+            tunnel_ids = list(self.active_tunnels)
+        if not tunnel_ids:
+            return []
+        
+        # Each destroy can block up to 5s waiting on a process, so overlap them
+        with ThreadPoolExecutor(max_workers=min(32, len(tunnel_ids))) as executor:
+            return list(executor.map(self.destroy_tunnel, tunnel_ids))
+    
     def restart_tunnel(self, tunnel_id: str) -> Tuple[bool, str]:
         """Restart an SSH tunnel"""
-        # First destroy if active
+        # First destroy if active; destroy_tunnel waits for the processes to exit
         if tunnel_id in self.active_tunnels:
             destroy_result = self.destroy_tunnel(tunnel_id)
             if not destroy_result[0]:
                 return destroy_result
         
-        # Wait a moment
-        time.sleep(1)
-        
         # Then create
         return self.create_tunnel(tunnel_id)
     
-    def get_tunnel_status(self, tunnel_id: str) -> Dict:
-        """Get detailed tunnel status"""
-        if tunnel_id not in self.active_tunnels:
+    def get_tunnel_status(self, tunnel_id: str, listening: Optional[set] = None) -> Dict:
+        """Get detailed tunnel status (listening: optional snapshot of listening ports)"""
+        tunnel_info = self.active_tunnels.get(tunnel_id)
+        if tunnel_info is None:
             return {
                 "status": "inactive",
                 "message": "Tunnel is not running"
             }
         
-        tunnel_info = self.active_tunnels[tunnel_id]
-        tunnel_type = tunnel_info.get("tunnel_type", "tcp")
-        
-        if tunnel_type == "udp":
+        if tunnel_info["kind"] is TunnelKind.UDP:
             return self._get_udp_tunnel_status(tunnel_id, tunnel_info)
         else:
-            return self._get_tcp_tunnel_status(tunnel_id, tunnel_info)
+            return self._get_tcp_tunnel_status(tunnel_id, tunnel_info, listening)
     
-    def _get_tcp_tunnel_status(self, tunnel_id: str, tunnel_info: Dict) -> Dict:
+    def _get_tcp_tunnel_status(self, tunnel_id: str, tunnel_info: Dict, listening: Optional[set] = None) -> Dict:
         """Get TCP tunnel status"""
         process = tunnel_info["process"]
         
         # Check if process is still alive
         if process.poll() is None:
             # Process is running, check port
-            if self._is_port_in_use(tunnel_info["local_port"]):
+            if listening is not None:
+                port_listening = tunnel_info["local_port"] in listening
+            else:
+                port_listening = self._is_port_in_use(tunnel_info["local_port"])
+            if port_listening:
                 uptime = time.time() - tunnel_info["started_at"]
                 return {
                     "status": "active",
@@ -507,8 +475,12 @@ class TunnelManager:
         status = {}
         all_tunnels = self.config_manager.get_tunnels()
         
-        for tunnel_id in all_tunnels:
-            status[tunnel_id] = self.get_tunnel_status(tunnel_id)
+        # One port snapshot answers every tunnel's listening check
+        listening = self._snapshot_listening_ports() if self.active_tunnels else None
+        
+        # Copy the ids: API calls run this in a worker thread while tunnels may be added
+        for tunnel_id in list(all_tunnels):
+            status[tunnel_id] = self.get_tunnel_status(tunnel_id, listening)
         
         return status
     
@@ -522,12 +494,7 @@ class TunnelManager:
         
         try:
             if tunnel_type == "tcp":
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(5)
-                result = sock.connect_ex(('127.0.0.1', tunnel["local_port"]))
-                sock.close()
-                
-                if result == 0:
+                if self._is_port_responding(tunnel["local_port"], timeout=5):
                     return True, "✅ TCP tunnel is responding"
                 else:
                     return False, "❌ TCP tunnel is not responding"
@@ -560,12 +527,7 @@ class TunnelManager:
             start_time = time.time()
             
             if tunnel_type == "tcp":
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(5)
-                result = sock.connect_ex(('127.0.0.1', tunnel["local_port"]))
-                sock.close()
-                
-                if result == 0:
+                if self._is_port_responding(tunnel["local_port"], timeout=5):
                     latency = round((time.time() - start_time) * 1000, 2)
                     results["latency_ms"] = latency
                     results["status"] = "✅ Active"
@@ -588,21 +550,12 @@ class TunnelManager:
                     sock.close()
             
             # Get bandwidth statistics from logs
-            stats = self.config_manager.get_tunnel_stats(tunnel_id, hours=1)
-            if stats:
-                total_in = sum(s["bytes_in"] for s in stats)
-                total_out = sum(s["bytes_out"] for s in stats)
-                results["bandwidth"] = {
-                    "bytes_in": total_in,
-                    "bytes_out": total_out,
-                    "total": total_in + total_out
-                }
-            else:
-                results["bandwidth"] = {
-                    "bytes_in": 0,
-                    "bytes_out": 0,
-                    "total": 0
-                }
+            total_in, total_out = self.config_manager.get_tunnel_bandwidth_totals(tunnel_id, hours=1)
+            results["bandwidth"] = {
+                "bytes_in": total_in,
+                "bytes_out": total_out,
+                "total": total_in + total_out
+            }
             
             results["tunnel_type"] = tunnel_type.upper()
             
@@ -623,6 +576,7 @@ class TunnelManager:
     def stop_monitoring(self):
         """Stop tunnel monitoring"""
         self.monitoring_active = False
+        self._wake()
         if self.monitoring_thread:
             self.monitoring_thread.join(timeout=5)
     
@@ -632,11 +586,18 @@ class TunnelManager:
             try:
                 # Check each active tunnel
                 dead_tunnels = []
+                listening = self._snapshot_listening_ports()
+                port_traffic = self._read_tcp_counters() if self.active_tunnels else {}
+                # Our own ss child raises SIGCHLD; drop that wake-up (a tunnel that
+                # died meanwhile is still caught by the poll() pass below)
+                self._wake_monitor.clear()
                 
-                for tunnel_id, tunnel_info in self.active_tunnels.items():
-                    tunnel_type = tunnel_info.get("tunnel_type", "tcp")
-                    
-                    if tunnel_type == "tcp":
+                # Iterate a snapshot: create/destroy may change the dict meanwhile
+                with self._lock:
+                    snapshot = tuple(self.active_tunnels.items())
+                
+                for tunnel_id, tunnel_info in snapshot:
+                    if tunnel_info["kind"] is TunnelKind.TCP:
                         process = tunnel_info["process"]
                         
                         # Check if process is still alive
@@ -645,7 +606,12 @@ class TunnelManager:
                             continue
                         
                         # Check if port is still listening
-                        if not self._is_port_in_use(tunnel_info["local_port"]):
+                        local_port = tunnel_info["local_port"]
+                        if listening is not None:
+                            port_listening = local_port in listening
+                        else:
+                            port_listening = self._is_port_in_use(local_port)
+                        if not port_listening:
                             dead_tunnels.append(tunnel_id)
                             continue
                     else:
@@ -661,17 +627,24 @@ class TunnelManager:
                             continue
                     
                     # Update bandwidth stats
-                    self._update_bandwidth_stats(tunnel_id, tunnel_info)
+                    self._update_bandwidth_stats(tunnel_id, tunnel_info, port_traffic)
                 
                 # Restart dead tunnels if auto_start is enabled
+                all_tunnels = self.config_manager.get_tunnels() if dead_tunnels else {}
                 for tunnel_id in dead_tunnels:
-                    tunnel_config = self.config_manager.get_tunnel(tunnel_id)
+                    tunnel_config = all_tunnels.get(tunnel_id)
                     if tunnel_config and tunnel_config.get("auto_start", True):
-                        print(f"🔄 Restarting dead tunnel: {tunnel_id}")
+                        # Clean up dead tunnel, unless it was destroyed meanwhile
+                        with self._lock:
+                            dead_info = self.active_tunnels.pop(tunnel_id, None)
+                        if dead_info is None:
+                            continue
                         
-                        # Clean up dead tunnel
-                        if tunnel_id in self.active_tunnels:
-                            del self.active_tunnels[tunnel_id]
+                        # Whatever survived (UDP ssh/socat, remote bridge) would hold
+                        # the ports the new instance needs
+                        self._release_processes(dead_info)
+                        
+                        print(f"🔄 Restarting dead tunnel: {tunnel_id}")
                         
                         # Log event
                         self.config_manager.log_event(
@@ -682,50 +655,232 @@ class TunnelManager:
                         )
                         
                         # Restart tunnel
-                        self.create_tunnel(tunnel_id)
+                        success, message = self.create_tunnel(tunnel_id)
+                        if not success:
+                            # Not tracked any more; don't leave it recorded as running
+                            self.config_manager.set_tunnel_helper_pids(tunnel_id, [])
+                            self.config_manager.update_tunnel_status(tunnel_id, "inactive", None)
+                            self.config_manager.log_event(
+                                "tunnel_logs",
+                                tunnel_id=tunnel_id,
+                                event_type="error",
+                                message=f"Auto-restart failed: {message}"
+                            )
+                
+                self._flush_bw_batch()
                 
-                # Sleep before next check
-                time.sleep(self.config_manager.config["settings"]["tunnel_check_interval"])
+                # Sleep until the next check, or until a tunnel process exits
+                self._wait_for_exit(self._check_interval)
                 
             except Exception as e:
                 print(f"Monitoring error: {e}")
                 time.sleep(30)  # Wait longer on error
     
-    def _test_remote_connectivity(self, host: str, port: int) -> Tuple[bool, str]:
-        """Test if remote server is reachable"""
+    def _create_exit_selector(self) -> Optional[selectors.BaseSelector]:
+        """Set up a selector for process exit notification via pidfds (Linux >= 5.3)"""
+        if not hasattr(os, "pidfd_open"):
+            return None
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(10)
-            result = sock.connect_ex((host, port))
-            sock.close()
+            os.close(os.pidfd_open(os.getpid()))
             
-            if result == 0:
-                return True, "✅ Remote server is reachable"
-            else:
-                return False, f"❌ Cannot reach {host}:{port}"
-                
-        except Exception as e:
-            return False, f"❌ Connectivity test failed: {str(e)}"
+            # Self-pipe so stop_monitoring can interrupt select()
+            read_fd, self._wake_fd = os.pipe()
+            os.set_blocking(read_fd, False)
+            os.set_blocking(self._wake_fd, False)
+            
+            selector = selectors.DefaultSelector()
+            selector.register(read_fd, selectors.EVENT_READ, None)
+            return selector
+        except OSError:
+            return None  # Kernel without pidfd support; fall back to SIGCHLD
+    
+    def _watch_process(self, process: subprocess.Popen):
+        """Register a tunnel process so the monitor wakes when it exits"""
+        if self._exit_selector is None:
+            return
+        try:
+            pidfd = os.pidfd_open(process.pid)
+            self._exit_selector.register(pidfd, selectors.EVENT_READ, process)
+        except OSError:
+            pass  # Already gone; the next poll() notices
+    
+    def _wait_for_exit(self, timeout: float):
+        """Block until a watched process exits, the monitor is woken, or timeout"""
+        if self._exit_selector is None:
+            self._wake_monitor.wait(timeout)
+            self._wake_monitor.clear()
+            return
+        
+        for key, _ in self._exit_selector.select(timeout):
+            if key.data is None:
+                try:
+                    os.read(key.fd, 512)  # Drain wake-up bytes
+                except OSError:
+                    pass
+                continue
+            
+            # A pidfd turns readable once; drop it so select() doesn't spin
+            self._exit_selector.unregister(key.fd)
+            os.close(key.fd)
+    
+    def _wake(self):
+        """Interrupt the monitor's wait"""
+        if self._exit_selector is None:
+            self._wake_monitor.set()
+            return
+        try:
+            os.write(self._wake_fd, b"\0")
+        except OSError:
+            pass  # Pipe full: a wake-up is already pending
+    
+    def _install_sigchld_handler(self):
+        """Wake the monitor as soon as a tunnel process exits"""
+        # Signal handlers can only be installed from the main thread
+        if threading.current_thread() is not threading.main_thread():
+            return
+        
+        previous = signal.getsignal(signal.SIGCHLD)
+        
+        def on_sigchld(signum, frame):
+            # Only wake the monitor; reaping is left to Popen.poll() so other
+            # subprocess users keep their exit statuses
+            self._wake_monitor.set()
+            if callable(previous):
+                previous(signum, frame)
+        
+        try:
+            signal.signal(signal.SIGCHLD, on_sigchld)
+        except (ValueError, OSError):
+            pass
+    
+    def _test_remote_connectivity(self, host: str, port: int) -> Tuple[bool, str]:
+        """Test if remote server is reachable (results are reused for 5 seconds)"""
+        entry = self._reach_cache.get((host, port))
+        if entry and time.monotonic() - entry[0] < 5:
+            return entry[1]
+        
+        result = self._probe_remote_connectivity(host, port)
+        self._reach_cache[(host, port)] = (time.monotonic(), result)
+        return result
+    
+    def _probe_remote_connectivity(self, host: str, port: int) -> Tuple[bool, str]:
+        """Open a TCP connection to the remote server"""
+        if self._probe_tcp(host, port, 10):
+            return True, "✅ Remote server is reachable"
+        return False, f"❌ Cannot reach {host}:{port}"
+    
+    def _snapshot_listening_ports(self) -> Optional[set]:
+        """Get all local listening TCP ports in one kernel table read"""
+        try:
+            return {
+                conn.laddr.port for conn in psutil.net_connections(kind="tcp")
+                if conn.status == psutil.CONN_LISTEN
+            }
+        except (psutil.Error, OSError):
+            return None  # Not permitted; callers fall back to probing
     
     def _is_port_in_use(self, port: int) -> bool:
-        """Check if a port is in use"""
+        """Check if a port is in use (cannot be bound); never blocks"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(1)
-            result = sock.connect_ex(('127.0.0.1', port))
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind(('0.0.0.0', port))
+            return False
+        except OSError as e:
+            return e.errno == errno.EADDRINUSE
+        finally:
             sock.close()
-            return result == 0
-        except:
+    
+    def _is_port_responding(self, port: int, timeout: float = 1) -> bool:
+        """Check if something accepts TCP connections on a local port"""
+        return self._probe_tcp('127.0.0.1', port, timeout)
+    
+    def _probe_tcp(self, host: str, port: int, timeout: float) -> bool:
+        """Try a single TCP connect to host:port"""
+        try:
+            socket.create_connection((host, port), timeout=timeout).close()
+            return True
+        except OSError:
             return False
     
-    def _wait_for_port(self, port: int, timeout: int = 10) -> bool:
-        """Wait for port to become available"""
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            if self._is_port_in_use(port):
+    def _wait_for_port(self, port: int, timeout: int = 10, process=None) -> bool:
+        """Wait for port to become available, giving up early if process exits"""
+        deadline = time.monotonic() + timeout
+        delay = 0.05
+        while True:
+            # Connect rather than bind, so the probe can't steal the port
+            # from the process that is about to listen on it
+            if self._is_port_responding(port, timeout=0.05):
                 return True
-            time.sleep(0.5)
-        return False
+            if process is not None and process.poll() is not None:
+                return False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            # Back off (0.05, 0.1, 0.2, ... capped at 0.5s) so slow starts cost few probes
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.5)
+    
+    def _wait_for_udp_bind(self, port: int, timeout: float = 5, process=None) -> bool:
+        """Wait for a UDP port to be bound, giving up early if process exits"""
+        # UDP can't be connect-probed, so look for the socket in the kernel table
+        deadline = time.monotonic() + timeout
+        delay = 0.05
+        while True:
+            if process is not None and process.poll() is not None:
+                return False
+            try:
+                if any(conn.laddr and conn.laddr.port == port
+                       for conn in psutil.net_connections(kind="udp")):
+                    return True
+            except (psutil.Error, OSError):
+                # Can't read the socket table; accept a process that stays up for 1s
+                if process is None:
+                    return True
+                try:
+                    process.wait(timeout=1)
+                    return False
+                except subprocess.TimeoutExpired:
+                    return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.5)
+    
+    def _spawn(self, cmd: List[str]) -> subprocess.Popen:
+        """Start a tunnel process in its own process group"""
+        # stdout is never read; stderr goes to a temp file (not a pipe) so a
+        # long-running child can't block on a full pipe buffer
+        stderr_file = tempfile.TemporaryFile()
+        try:
+            process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.DEVNULL,
+                stderr=stderr_file,
+                close_fds=True,
+                start_new_session=True  # New session + process group, without a Python preexec_fn
+            )
+        except Exception:
+            stderr_file.close()
+            raise
+        process.stderr_file = stderr_file
+        self._watch_process(process)
+        return process
+    
+    def _read_stderr(self, process, limit: int = 4096) -> str:
+        """Read the start of a spawned process's captured stderr"""
+        stderr_file = getattr(process, "stderr_file", None)
+        if stderr_file is None or stderr_file.closed:
+            return ""
+        stderr_file.seek(0)
+        return stderr_file.read(limit).decode(errors="replace").strip()
+    
+    def _close_stderr(self, process):
+        """Release a spawned process's stderr capture file"""
+        stderr_file = getattr(process, "stderr_file", None)
+        if stderr_file is not None:
+            stderr_file.close()
     
     def _kill_process(self, process):
         """Kill a process and its children"""
@@ -740,46 +895,124 @@ class TunnelManager:
                 # Force kill if not responding
                 os.killpg(os.getpgid(process.pid), signal.SIGKILL)
                 process.wait()
-        except:
-            # Fallback to direct process kill
+        except OSError:
+            # Process group gone or not ours; fall back to direct process kill
             try:
                 process.terminate()
                 process.wait(timeout=5)
-            except:
+            except subprocess.TimeoutExpired:
                 process.kill()
+        finally:
+            self._close_stderr(process)
     
-    def _update_bandwidth_stats(self, tunnel_id: str, tunnel_info: Dict):
+    def _release_processes(self, tunnel_info: Dict):
+        """Stop whatever is left of a tunnel: local processes and the remote socat bridge"""
+        for key in ("process", "local_socat_process", "ssh_process"):
+            process = tunnel_info.get(key)
+            if process is None:
+                continue
+            if process.poll() is None:
+                self._kill_process(process)
+            else:
+                # Already reaped: its PID (and group) may belong to someone else now
+                self._close_stderr(process)
+        
+        remote_process = tunnel_info.get("remote_process_info")
+        if remote_process:
+            self._kill_remote_bridge(tunnel_info["server_id"], remote_process["pid"])
+    
+    def _kill_remote_bridge(self, server_id: str, pid: int):
+        """Stop a remote socat bridge over the pooled connection (left open)"""
+        try:
+            ssh = self.ssh_manager.get_connection(server_id)
+            if ssh:
+                ssh.exec_command(f"kill {int(pid)}")
+        except Exception:
+            pass  # Best effort
+    
+    def _read_tcp_counters(self) -> Dict[int, Tuple[int, int]]:
+        """Get (bytes_in, bytes_out) per local port since the last call, from one ss read"""
+        try:
+            result = subprocess.run(
+                ["ss", "-tinH", "state", "established"],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, timeout=5
+            )
+        except (OSError, subprocess.SubprocessError):
+            return {}
+        
+        traffic = {}
+        counters = {}
+        conn = None
+        for line in result.stdout.splitlines():
+            if not line[:1].isspace():
+                # Connection line: Recv-Q Send-Q Local:Port Peer:Port
+                parts = line.split()
+                conn = (parts[2], parts[3]) if len(parts) >= 4 else None
+                continue
+            if conn is None:
+                continue
+            
+            # tcp_info line; bytes_sent needs kernel 4.19+, bytes_acked is older
+            received = re.search(r"\bbytes_received:(\d+)", line)
+            sent = re.search(r"\bbytes_sent:(\d+)", line) or re.search(r"\bbytes_acked:(\d+)", line)
+            current = (int(received.group(1)) if received else 0, int(sent.group(1)) if sent else 0)
+            counters[conn] = current
+            
+            # Count only what moved since the last sample of this connection
+            last_in, last_out = self._conn_counters.get(conn, (0, 0))
+            port = int(conn[0].rsplit(":", 1)[1])
+            port_in, port_out = traffic.get(port, (0, 0))
+            traffic[port] = (port_in + current[0] - last_in, port_out + current[1] - last_out)
+            conn = None
+        
+        self._conn_counters = counters
+        return traffic
+    
+    def _update_bandwidth_stats(self, tunnel_id: str, tunnel_info: Dict, port_traffic: Dict[int, Tuple[int, int]]):
         """Update bandwidth statistics for a tunnel"""
+        # Traffic enters on the local listener: the tunnel port for TCP, or the
+        # ssh forward that socat feeds for UDP
+        port = tunnel_info.get("local_tcp_port", tunnel_info["local_port"])
+        bytes_in, bytes_out = port_traffic.get(port, (0, 0))
+        tunnel_info["bytes_received"] += bytes_in
+        tunnel_info["bytes_sent"] += bytes_out
+        
+        # Log a bandwidth entry every minute
+        current_time = time.time()
+        if 'last_bandwidth_update' not in tunnel_info:
+            tunnel_info['last_bandwidth_update'] = current_time
+            tunnel_info['logged_bytes'] = (tunnel_info["bytes_received"], tunnel_info["bytes_sent"])
+            return
+        
+        elapsed = current_time - tunnel_info['last_bandwidth_update']
+        if elapsed >= 60:
+            # Queue the traffic since the last entry for the cycle's batch
+            logged_in, logged_out = tunnel_info['logged_bytes']
+            self._bw_batch.append((
+                tunnel_id,
+                tunnel_info["bytes_received"] - logged_in,
+                tunnel_info["bytes_sent"] - logged_out,
+                int(elapsed),
+                tunnel_info["kind"].name.lower()
+            ))
+            tunnel_info['last_bandwidth_update'] = current_time
+            tunnel_info['logged_bytes'] = (tunnel_info["bytes_received"], tunnel_info["bytes_sent"])
+    
+    def _flush_bw_batch(self):
+        """Write queued bandwidth stats in one transaction"""
+        batch, self._bw_batch = self._bw_batch, []
         try:
-            # Get network stats (simplified - in real implementation, 
-            # you'd monitor the specific network interface)
-            
-            # For now, just log a bandwidth entry every minute
-            current_time = time.time()
-            if not hasattr(tunnel_info, 'last_bandwidth_update'):
-                tunnel_info['last_bandwidth_update'] = current_time
-                return
-            
-            if current_time - tunnel_info['last_bandwidth_update'] >= 60:
-                # Log bandwidth stats (placeholder values)
-                self.config_manager.log_event(
-                    "bandwidth_stats",
-                    tunnel_id=tunnel_id,
-                    bytes_in=tunnel_info.get("bytes_received", 0),
-                    bytes_out=tunnel_info.get("bytes_sent", 0),
-                    duration=60
-                )
-                tunnel_info['last_bandwidth_update'] = current_time
-        except:
-            pass
+            self.config_manager.log_bandwidth_batch(batch)
+        except Exception as e:
+            print(f"Error writing bandwidth stats: {e}")
     
     def cleanup(self):
         """Cleanup all tunnels and stop monitoring"""
         self.stop_monitoring()
+        self._flush_bw_batch()
         
         # Kill all active tunnels
-        for tunnel_id in list(self.active_tunnels.keys()):
-            self.destroy_tunnel(tunnel_id)
+        self.destroy_all_tunnels()
 
 # Example usage
 if __name__ == "__main__":
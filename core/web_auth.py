@@ -5,17 +5,25 @@ Web Authentication Manager
 """
 
 import hashlib
+import hmac
 import secrets
+import threading
 import time
+from collections import OrderedDict
 from typing import Optional, Dict
 import jwt
 import os
 
 class WebAuthManager:
+    TOKEN_CACHE_SIZE = 4096  # verified tokens kept; least recently used go first
+    
     def __init__(self, config_manager):
         self.config_manager = config_manager
         self.secret_key = self._get_or_create_secret_key()
-        self.active_sessions = {}  # session_id -> user_info
+        self.secret_key_bytes = self.secret_key.encode()
+        self.active_sessions = {}  # cookie session_id -> user_info
+        self._token_cache = OrderedDict()  # sha256(token) -> verified payload, LRU order
+        self._token_cache_lock = threading.Lock()  # auth dependencies run in the threadpool
     
     def _get_or_create_secret_key(self) -> str:
         """Get or create JWT secret key"""
@@ -55,9 +63,16 @@ class WebAuthManager:
         if not web_auth:
             return None
         
-        # Check credentials
-        if (username == web_auth["username"] and 
-            self._verify_password(password, web_auth["password_hash"])):
+        # Check credentials; always run both checks so a wrong username
+        # can't be told apart from a wrong password by response time
+        username_ok = hmac.compare_digest(username.encode(), web_auth["username"].encode())
+        password_ok = self._verify_password(password, web_auth["password_hash"])
+        if username_ok and password_ok:
+            
+            # Upgrade legacy PBKDF2 hashes now that we have the plain password
+            if not web_auth["password_hash"].startswith("scrypt$"):
+                web_auth["password_hash"] = self._hash_password(password)
+                self.config_manager.save_config()
             
             # Generate JWT token
             payload = {
@@ -66,15 +81,7 @@ class WebAuthManager:
                 "iat": time.time()
             }
             
-            token = jwt.encode(payload, self.secret_key, algorithm="HS256")
-            
-            # Store session
-            session_id = secrets.token_hex(16)
-            self.active_sessions[session_id] = {
-                "username": username,
-                "token": token,
-                "created_at": time.time()
-            }
+            token = jwt.encode(payload, self.secret_key_bytes, algorithm="HS256")
             
             return token
         
@@ -82,14 +89,63 @@ class WebAuthManager:
     
     def verify_token(self, token: str) -> Optional[Dict]:
         """Verify JWT token"""
+        # Dashboard polling re-sends the same token; skip HMAC + JSON on repeats.
+        # Keyed by digest so the cache never holds usable tokens.
+        key = hashlib.sha256(token.encode()).digest()
+        with self._token_cache_lock:
+            payload = self._token_cache.get(key)
+            if payload is not None:
+                if payload.get("exp", float("inf")) > time.time():
+                    self._token_cache.move_to_end(key)
+                    return payload
+                del self._token_cache[key]
+                return None
+        
         try:
-            payload = jwt.decode(token, self.secret_key, algorithms=["HS256"])
+            payload = jwt.decode(token, self.secret_key_bytes, algorithms=["HS256"])
+            with self._token_cache_lock:
+                self._token_cache[key] = payload
+                if len(self._token_cache) > self.TOKEN_CACHE_SIZE:
+                    self._token_cache.popitem(last=False)
             return payload
         except jwt.ExpiredSignatureError:
             return None
         except jwt.InvalidTokenError:
             return None
     
+    def create_session(self, username: str) -> str:
+        """Create an opaque session id for the dashboard cookie"""
+        now = time.time()
+        # Drop expired sessions so the table doesn't grow with every login
+        for session_id, session in list(self.active_sessions.items()):
+            if session["exp"] <= now:
+                self.active_sessions.pop(session_id, None)
+        
+        session_id = secrets.token_urlsafe(32)
+        self.active_sessions[session_id] = {
+            "username": username,
+            "exp": now + 3600,  # Same lifetime as the JWT
+            "iat": now
+        }
+        return session_id
+    
+    def verify_session(self, session_id: Optional[str]) -> Optional[Dict]:
+        """Look up a session id; a dict hit, no signature check"""
+        if not session_id:
+            return None
+        session = self.active_sessions.get(session_id)
+        if session is None:
+            return None
+        if session["exp"] <= time.time():
+            self.active_sessions.pop(session_id, None)
+            return None
+        return session
+    
+    def end_session(self, session_id: Optional[str]):
+        """Forget a session id (logout)"""
+        if session_id:
+            self.active_sessions.pop(session_id, None)
+    
     def change_password(self, old_password: str, new_password: str) -> bool:
         """Change web user password"""
         web_auth = self.config_manager.config.get("web_auth")
@@ -104,17 +160,25 @@ class WebAuthManager:
         web_auth["password_hash"] = self._hash_password(new_password)
         return self.config_manager.save_config()
     
-    def _hash_password(self, password: str) -> str:
-        """Hash password with salt"""
-        salt = secrets.token_hex(16)
-        password_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000)
-        return f"{salt}:{password_hash.hex()}"
+    def _hash_password(self, password: str, n: int = 2**14, r: int = 8, p: int = 1) -> str:
+        """Hash password with salt (scrypt$N$r$p$salt$hash)"""
+        salt = secrets.token_bytes(16)
+        password_hash = hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, dklen=32)
+        return f"scrypt${n}${r}${p}${salt.hex()}${password_hash.hex()}"
     
     def _verify_password(self, password: str, password_hash: str) -> bool:
         """Verify password against hash"""
         try:
-            salt, hash_hex = password_hash.split(':')
-            password_hash_check = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000)
-            return password_hash_check.hex() == hash_hex
-        except:
-            return False
+            if password_hash.startswith("scrypt$"):
+                _, n, r, p, salt_hex, hash_hex = password_hash.split('$')
+                password_hash_check = hashlib.scrypt(
+                    password.encode(), salt=bytes.fromhex(salt_hex),
+                    n=int(n), r=int(r), p=int(p), dklen=32
+                )
+            else:
+                # Legacy PBKDF2 format (salt:hash), upgraded on next login
+                salt, hash_hex = password_hash.split(':')
+                password_hash_check = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000)
+            return hmac.compare_digest(password_hash_check, bytes.fromhex(hash_hex))
+        except (ValueError, TypeError):
+            return False  # Malformed stored hash
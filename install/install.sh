@@ -167,7 +167,7 @@ install_python_deps() {
     # Install required packages
     python3 -m pip install \
         fastapi==0.104.1 \
-        uvicorn==0.24.0 \
+        "uvicorn[standard]==0.24.0" \
         python-multipart==0.0.6 \
         psutil==5.9.6 \
         paramiko==3.3.1 \
@@ -5,6 +5,9 @@ PasRah Web Dashboard Starter - Improved
 
 import sys
 import os
+import time
+import socket
+import ipaddress
 import requests
 
 # Add paths
@@ -13,42 +16,74 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from core.config_manager import ConfigManager
 from core.web_auth import WebAuthManager
 
-def get_local_ip():
-    """Get local server public IP"""
+def get_local_ip(cache_file=None):
+    """Get local server public IP (cached for 24 hours)"""
     try:
-        response = requests.get('https://api.ipify.org', timeout=5)
-        if response.status_code == 200:
-            return response.text.strip()
-    except:
+        if cache_file and time.time() - os.path.getmtime(cache_file) < 86400:
+            with open(cache_file, 'r') as f:
+                return f.read().strip()
+    except OSError:
         pass
-    return 'Unknown'
+    
+    # Address of the default-route interface; a UDP connect sends no packets
+    ip = None
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.connect(('8.8.8.8', 80))
+            ip = sock.getsockname()[0]
+    except OSError:
+        pass
+    
+    # Behind NAT the interface address isn't reachable; ask ipify instead
+    if ip is None or ipaddress.ip_address(ip).is_private:
+        try:
+            response = requests.get('https://api.ipify.org', timeout=2)
+            if response.status_code == 200:
+                ip = str(ipaddress.ip_address(response.text.strip()))
+        except (requests.RequestException, ValueError):
+            pass
+    
+    if ip is None:
+        return 'Unknown'
+    
+    # Only cache a public answer, so a failed ipify lookup is retried next start
+    if cache_file and not ipaddress.ip_address(ip).is_private:
+        try:
+            with open(cache_file, 'w') as f:
+                f.write(ip)
+        except OSError:
+            pass
+    return ip
+
+# Flag table, most specific network first so the first hit is the longest prefix
+FLAG_NETWORKS = sorted([
+    (ipaddress.ip_network('10.0.0.0/8'), '🖥️'),
+    (ipaddress.ip_network('172.16.0.0/12'), '🖥️'),
+    (ipaddress.ip_network('192.168.0.0/16'), '🖥️'),
+    (ipaddress.ip_network('127.0.0.0/8'), '🖥️'),
+    (ipaddress.ip_network('167.172.0.0/16'), '🇩🇪'),  # DigitalOcean Germany
+    (ipaddress.ip_network('164.92.0.0/16'), '🇺🇸'),  # DigitalOcean US
+    (ipaddress.ip_network('46.8.0.0/16'), '🇩🇪'),  # Germany
+    (ipaddress.ip_network('185.0.0.0/8'), '🇪🇺'),  # Europe
+], key=lambda entry: entry[0].prefixlen, reverse=True)
 
 def get_country_flag(ip):
     """Get country flag for IP"""
     try:
-        if ip.startswith(('192.168.', '10.', '172.')) or ip == '127.0.0.1':
-            return '🖥️'
-        
-        # Simple mapping for common IPs
-        if ip.startswith('167.172.'):
-            return '🇩🇪'  # DigitalOcean Germany
-        elif ip.startswith('164.92.'):
-            return '🇺🇸'  # DigitalOcean US
-        elif ip.startswith('46.8.'):
-            return '🇩🇪'  # Germany
-        elif ip.startswith('185.'):
-            return '🇪🇺'  # Europe
-        
-        return '🌍'
-    except:
-        return '🌍'
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return '🌍'  # 'Unknown' or a hostname
+    for network, flag in FLAG_NETWORKS:
+        if address in network:
+            return flag
+    return '🌍'
 
 def main():
     config_manager = ConfigManager()
     web_auth = WebAuthManager(config_manager)
     
     # Get local IP info
-    local_ip = get_local_ip()
+    local_ip = get_local_ip(config_manager.base_dir / "data" / "public_ip")
     local_flag = get_country_flag(local_ip)
     
     print("=" * 70)
@@ -94,11 +129,14 @@ def main():
     print("=" * 70)
     
     # Import and run the web app
+    # Single worker: tunnel processes and their state live in this process.
+    # uvicorn picks uvloop/httptools on its own when uvicorn[standard] is installed.
     import uvicorn
     uvicorn.run(
         "web.backend.app:app", 
         host="0.0.0.0", 
         port=config_manager.config["settings"]["web_port"],
+        access_log=False,
         reload=False
     )
 
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+PasRah - SSH Tunnel Manager
+ConfigManager migration tests
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.config_manager import ConfigManager
+
+LEGACY_CONFIG = {
+    "version": "1.0.0",
+    "servers": {
+        "10.0.0.1_22": {
+            "id": "10.0.0.1_22",
+            "host": "10.0.0.1",
+            "port": 22,
+            "username": "root",
+            "password_hash": "d5d18f3789c9b0cf7648e6af69ef41bb14035d68b7e77af5f01284f8d18cfd3f",
+            "status": "active",
+            "tunnels": ["t_4444"]
+        }
+    },
+    "tunnels": {
+        "t_4444": {
+            "id": "t_4444",
+            "name": "t",
+            "server_id": "10.0.0.1_22",
+            "local_port": 4444,
+            "remote_port": 4444,
+            "remote_host": "localhost",
+            "status": "active",
+            "pid": 123,
+            "auto_start": True
+        }
+    },
+    "settings": {}
+}
+
+class LegacyMigrationTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base_dir = Path(self.tmp.name)
+        (self.base_dir / "data").mkdir()
+        with open(self.base_dir / "data" / "config.json", 'w') as f:
+            json.dump(LEGACY_CONFIG, f)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _db_rows(self, table):
+        conn = sqlite3.connect(self.base_dir / "data" / "pasrah.db")
+        try:
+            return {row[0]: json.loads(row[1]) for row in conn.execute(f'SELECT id, data FROM {table}')}
+        finally:
+            conn.close()
+
+    def test_legacy_fields_not_written_to_database(self):
+        ConfigManager(self.base_dir)
+
+        server = self._db_rows("servers")["10.0.0.1_22"]
+        tunnel = self._db_rows("tunnels")["t_4444"]
+        self.assertNotIn("password_hash", server)
+        self.assertNotIn("pid", tunnel)
+        self.assertEqual(tunnel["process_info"]["main_pid"], 123)
+
+    def test_polluted_rows_cleaned_on_load(self):
+        # Database written by a version that migrated before cleaning
+        ConfigManager(self.base_dir)
+        conn = sqlite3.connect(self.base_dir / "data" / "pasrah.db")
+        conn.execute('UPDATE servers SET data = ?', (json.dumps(LEGACY_CONFIG["servers"]["10.0.0.1_22"]),))
+        conn.execute('UPDATE tunnels SET data = ?', (json.dumps(LEGACY_CONFIG["tunnels"]["t_4444"]),))
+        conn.commit()
+        conn.close()
+
+        ConfigManager(self.base_dir)
+
+        self.assertNotIn("password_hash", self._db_rows("servers")["10.0.0.1_22"])
+        self.assertNotIn("pid", self._db_rows("tunnels")["t_4444"])
+
+    def test_config_file_drops_records(self):
+        ConfigManager(self.base_dir)
+
+        with open(self.base_dir / "data" / "config.json") as f:
+            file_config = json.load(f)
+        self.assertNotIn("servers", file_config)
+        self.assertNotIn("tunnels", file_config)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,16 +1,25 @@
 #!/usr/bin/env python3
-from fastapi import FastAPI, HTTPException, Depends, status, UploadFile, File
+from fastapi import FastAPI, HTTPException, Depends, status, UploadFile, File, BackgroundTasks, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import sys
 import os
-import requests
-import tempfile
+import io
+import tarfile
 import json
-import psutil
-from datetime import datetime, timedelta
+import time
+import threading
+import ipaddress
+import bisect
+import hashlib
+import secrets
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Optional
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -43,45 +52,87 @@ class LoginRequest(BaseModel):
     username: str
     password: str
 
+config_manager = ConfigManager()
+ssh_manager = SSHManager(config_manager)
+tunnel_manager = TunnelManager(config_manager, ssh_manager)
+web_auth = WebAuthManager(config_manager)
+
 app = FastAPI(title="PasRah Web Dashboard", version="1.0.0")
 
+# The dashboard is served from this app, so only extra origins need listing
+_web_port = config_manager.config["settings"].get("web_port", 8080)
+CORS_ORIGINS = [
+    f"http://localhost:{_web_port}",
+    f"http://127.0.0.1:{_web_port}",
+] + list(config_manager.config["settings"].get("cors_origins", []))
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=CORS_ORIGINS,
+    allow_methods=["GET", "POST", "DELETE"],
+    allow_headers=["Authorization", "Content-Type"],
+    max_age=86400,
 )
 
+# Dashboard page and JSON lists compress well; tiny responses aren't worth it
+app.add_middleware(GZipMiddleware, minimum_size=512)
+
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
-config_manager = ConfigManager()
-ssh_manager = SSHManager(config_manager)
-tunnel_manager = TunnelManager(config_manager, ssh_manager)
-web_auth = WebAuthManager(config_manager)
+# Flag table as sorted, non-overlapping IPv4 integer ranges: one bisect per lookup
+FLAG_NETWORKS = [
+    (ipaddress.ip_network('10.0.0.0/8'), '🖥️'),
+    (ipaddress.ip_network('172.16.0.0/12'), '🖥️'),
+    (ipaddress.ip_network('192.168.0.0/16'), '🖥️'),
+    (ipaddress.ip_network('127.0.0.0/8'), '🖥️'),
+    (ipaddress.ip_network('167.172.0.0/16'), '🇩🇪'),
+    (ipaddress.ip_network('37.32.0.0/16'), '🇮🇷'),
+    (ipaddress.ip_network('185.0.0.0/8'), '🇪🇺'),
+]
+_FLAG_RANGES = sorted(
+    (int(network.network_address), int(network.broadcast_address), flag)
+    for network, flag in FLAG_NETWORKS
+)
+_FLAG_STARTS = [start for start, _, _ in _FLAG_RANGES]
 
+@lru_cache(maxsize=1024)
 def get_country_flag(ip):
+    if ip == 'localhost':
+        return '🖥️'
     try:
-        if ip.startswith(('192.168.', '10.', '172.')) or ip == '127.0.0.1' or ip == 'localhost':
-            return '🖥️'
-        if ip.startswith('167.172.'):
-            return '🇩🇪'
-        elif ip.startswith('37.32.'):
-            return '🇮🇷'
-        elif ip.startswith('185.'):
-            return '🇪🇺'
-        return '🌍'
-    except:
-        return '🌍'
+        ip_int = int(ipaddress.IPv4Address(ip))
+    except ValueError:
+        return '🌍'  # Hostname, IPv6 or garbage
+    idx = bisect.bisect_right(_FLAG_STARTS, ip_int) - 1
+    if idx >= 0 and ip_int <= _FLAG_RANGES[idx][1]:
+        return _FLAG_RANGES[idx][2]
+    return '🌍'
+
+# Keep-alive session and cached answer, so "/" doesn't do a TLS handshake per load
+_SESSION = None
+_ip_cache = {"ip": None, "expires": 0.0}
 
 def get_local_ip():
+    global _SESSION
+    if _ip_cache["ip"] and time.monotonic() < _ip_cache["expires"]:
+        return _ip_cache["ip"]
+    
+    # requests is only needed here, at most once an hour; keep it out of startup
+    import requests
+    if _SESSION is None:
+        _SESSION = requests.Session()
+    
+    ip, ttl = 'Unknown', 60  # Retry a failed lookup after a minute
     try:
-        response = requests.get('https://api.ipify.org', timeout=5)
+        response = _SESSION.get('https://api.ipify.org', timeout=5)
         if response.status_code == 200:
-            return response.text.strip()
-    except:
+            ip, ttl = response.text.strip(), 3600
+    except requests.RequestException:
         pass
-    return 'Unknown'
+    
+    _ip_cache["ip"], _ip_cache["expires"] = ip, time.monotonic() + ttl
+    return ip
 
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
@@ -90,12 +141,21 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
     return user
 
-@app.get("/")
-async def root():
-    local_ip = get_local_ip()
+def get_session_user(request: Request, credentials: HTTPAuthorizationCredentials = Depends(optional_security)):
+    # Polled GETs: session cookie is a dict lookup; fall back to the bearer token
+    user = web_auth.verify_session(request.cookies.get("sid"))
+    if user:
+        return user
+    if credentials is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    return get_current_user(credentials)
+
+@lru_cache(maxsize=1)
+def render_dashboard(local_ip):
+    """Build the dashboard page; only the server IP varies, so keep the last one"""
     local_flag = get_country_flag(local_ip)
     
-    return HTMLResponse(f"""
+    return f"""
 <!DOCTYPE html>
 <html>
 <head>
@@ -218,6 +278,7 @@ async def root():
         .status-active {{ background: #28a745; }}
         .status-inactive {{ background: #6c757d; }}
         .status-error {{ background: #dc3545; }}
+        .status-provisioning {{ background: #ffc107; }}
         .radio-group {{
             display: flex;
             gap: 15px;
@@ -511,6 +572,9 @@ async def root():
 
     <script>
         const {{ createApp }} = Vue;
+        // Flags keyed by first two octets, then by first octet (longest prefix wins)
+        const FLAG_BY_TWO_OCTETS = {{ '37.32': '🇮🇷', '167.172': '🇩🇪' }};
+        const FLAG_BY_FIRST_OCTET = {{ '185': '🇪🇺' }};
         createApp({{
             data() {{ return {{
                 isAuthenticated: false,
@@ -520,6 +584,8 @@ async def root():
                 stats: {{ servers: 0, tunnels: 0, active_tunnels: 0, total_bandwidth: 0 }},
                 servers: [],
                 tunnels: [],
+                serversById: {{}},
+                tunnelCountByServer: {{}},
                 serverForm: {{ 
                     host: '', 
                     port: 22, 
@@ -554,17 +620,17 @@ async def root():
                     return parseFloat((bytes / Math.pow(k, i)).toFixed(1)) + ' ' + sizes[i];
                 }},
                 getCountryFlag(ip) {{
-                    if (ip.startsWith('37.32.')) return '🇮🇷';
-                    if (ip.startsWith('167.172.')) return '🇩🇪';
-                    if (ip.startsWith('185.')) return '🇪🇺';
-                    return '🌍';
+                    const octets = ip.split('.', 2);
+                    return FLAG_BY_TWO_OCTETS[octets[0] + '.' + octets[1]]
+                        || FLAG_BY_FIRST_OCTET[octets[0]]
+                        || '🌍';
                 }},
                 getServerHost(serverId) {{
-                    const server = this.servers.find(s => s.id === serverId);
+                    const server = this.serversById[serverId];
                     return server ? server.host : 'Unknown';
                 }},
                 getServerTunnelCount(serverId) {{
-                    return this.tunnels.filter(t => t.server_id === serverId).length;
+                    return this.tunnelCountByServer[serverId] || 0;
                 }},
                 async login() {{
                     try {{
@@ -578,6 +644,7 @@ async def root():
                     }}
                 }},
                 logout() {{ 
+                    axios.post('/api/logout').catch(() => {{}});
                     this.isAuthenticated = false; 
                     this.token = null; 
                     this.loginError = '';
@@ -585,14 +652,14 @@ async def root():
                 async loadData() {{
                     const headers = {{ Authorization: `Bearer ${{this.token}}` }};
                     try {{
-                        const [stats, servers, tunnels] = await Promise.all([
-                            axios.get('/api/stats', {{ headers }}),
-                            axios.get('/api/servers', {{ headers }}),
-                            axios.get('/api/tunnels', {{ headers }})
-                        ]);
-                        this.stats = stats.data;
-                        this.servers = Object.values(servers.data);
-                        this.tunnels = Object.values(tunnels.data);
+                        const response = await axios.get('/api/dashboard', {{ headers }});
+                        this.stats = response.data.stats;
+                        this.serversById = response.data.servers;
+                        this.servers = Object.values(response.data.servers);
+                        this.tunnels = Object.values(response.data.tunnels);
+                        const counts = {{}};
+                        for (const t of this.tunnels) counts[t.server_id] = (counts[t.server_id] || 0) + 1;
+                        this.tunnelCountByServer = counts;
                     }} catch (error) {{ 
                         console.error('Failed to load data:', error);
                         if (error.response?.status === 401) {{
@@ -626,7 +693,7 @@ async def root():
                         const response = await axios.post('/api/servers', this.serverForm, {{ 
                             headers: {{ Authorization: `Bearer ${{this.token}}` }} 
                         }});
-                        this.serverResult = 'Server added successfully!';
+                        this.serverResult = response.data.message;
                         await this.loadData();
                         setTimeout(() => this.closeModal(), 2000);
                     }} catch (error) {{ 
@@ -767,53 +834,134 @@ async def root():
     </script>
 </body>
 </html>
-    """)
+    """
+
+@app.on_event("startup")
+async def prefetch_local_ip():
+    # Warm the cache in the background so the first page load doesn't wait on ipify
+    threading.Thread(target=get_local_ip, daemon=True).start()
+
+@app.get("/")
+async def root():
+    # A cache miss is an HTTPS round-trip; don't hold the event loop for it
+    return HTMLResponse(render_dashboard(await run_in_threadpool(get_local_ip)))
 
 @app.post("/api/login")
-async def login(request: LoginRequest):
+async def login(request: LoginRequest, response: Response):
     token = web_auth.authenticate(request.username, request.password)
     if token:
+        response.set_cookie(
+            "sid", web_auth.create_session(request.username),
+            max_age=3600, httponly=True, samesite="strict"
+        )
         return {"token": token}
     else:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+# Prefix ETags per process: records_version restarts at 0 after a restart
+_ETAG_PREFIX = secrets.token_hex(4)
+
+def check_etag(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Tag the response; return a bare 304 if the client already has this version"""
+    headers = {"ETag": f'"{_ETAG_PREFIX}-{etag}"', "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+def status_fingerprint(statuses: Dict) -> str:
+    """Short digest of the per-tunnel status strings shown in the tunnel list"""
+    joined = ",".join(f"{tunnel_id}={info['status']}" for tunnel_id, info in statuses.items())
+    return hashlib.md5(joined.encode()).hexdigest()[:16]
+
+def servers_payload() -> Dict:
+    # New dicts: don't write "id" back into the stored config
+    return {server_id: {**server, "id": server_id}
+            for server_id, server in config_manager.get_servers().items()}
+
+def tunnels_payload(statuses: Dict) -> Dict:
+    # tunnel_type defaults to tcp for backwards compatibility; stored config is left as is
+    return {
+        tunnel_id: {
+            "tunnel_type": "tcp",
+            **tunnel,
+            "id": tunnel_id,
+            "status": statuses.get(tunnel_id, {}).get("status", "inactive")
+        }
+        for tunnel_id, tunnel in config_manager.get_tunnels().items()
+    }
+
+@app.post("/api/logout")
+async def logout(request: Request, response: Response):
+    web_auth.end_session(request.cookies.get("sid"))
+    response.delete_cookie("sid")
+    return {"message": "Logged out"}
+
+# The dashboard polls stats; answer repeated polls within a second from cache
+_stats_cache = {"value": None, "expires": 0.0}
+
+def invalidate_stats():
+    _stats_cache["expires"] = 0.0
+
 @app.get("/api/stats")
-async def get_stats(user: dict = Depends(get_current_user)):
+async def get_stats(user: dict = Depends(get_session_user)):
+    if _stats_cache["value"] and time.monotonic() < _stats_cache["expires"]:
+        return _stats_cache["value"]
+    
     servers = config_manager.get_servers()
     tunnels = config_manager.get_tunnels()
     active_tunnels = len(tunnel_manager.active_tunnels)
-    return {
+    stats = {
         "servers": len(servers), 
         "tunnels": len(tunnels), 
         "active_tunnels": active_tunnels, 
         "total_bandwidth": 1024*1024
     }
+    _stats_cache.update(value=stats, expires=time.monotonic() + 1.0)
+    return stats
 
 @app.get("/api/servers")
-async def get_servers(user: dict = Depends(get_current_user)):
-    servers = config_manager.get_servers()
-    for server_id, server in servers.items():
-        server["id"] = server_id
-    return servers
+async def get_servers(request: Request, response: Response, user: dict = Depends(get_session_user)):
+    not_modified = check_etag(request, response, f"s{config_manager.records_version}")
+    if not_modified:
+        return not_modified
+    return servers_payload()
+
+def run_server_setup(server_id: str, host: str, port: int, username: str, password: str, options: dict):
+    """Background part of add_server: key copy and the optional provisioning steps"""
+    setup_success, setup_message = ssh_manager.setup_server(
+        server_id, host, port, username, password, options
+    )
+    if not setup_success:
+        config_manager.update_server_status(server_id, "error")
+        config_manager.log_event(
+            "server_logs",
+            server_id=server_id,
+            event_type="error",
+            message=setup_message
+        )
 
-@app.post("/api/servers")
-async def add_server(server: ServerCreate, user: dict = Depends(get_current_user)):
+@app.post("/api/servers", status_code=202)
+async def add_server(server: ServerCreate, background_tasks: BackgroundTasks, user: dict = Depends(get_current_user)):
     try:
-        # Test connection first
-        success, message = ssh_manager.test_connection(
-            server.host, server.port, server.username, server.password
+        # Test connection first (SSH handshake; off the event loop)
+        success, message = await run_in_threadpool(
+            ssh_manager.test_connection,
+            server.host, server.port, server.username, server.password,
+            keep_open=True  # Setup below reuses the authenticated session
         )
         if not success:
             raise HTTPException(status_code=400, detail=f"Connection test failed: {message}")
         
         # Setup server
         server_id = f"{server.host}_{server.port}"
-        config_manager.add_server(server_id, {
+        await run_in_threadpool(config_manager.add_server, server_id, {
             "host": server.host, 
             "port": server.port, 
             "username": server.username, 
             "password": server.password
         })
+        invalidate_stats()
         
         # Configure server with options
         options = {
@@ -823,29 +971,48 @@ async def add_server(server: ServerCreate, user: dict = Depends(get_current_user
             "ssh_hardening": server.ssh_hardening
         }
         
-        setup_success, setup_message = ssh_manager.setup_server(
+        # Setup can take minutes (system update, fail2ban); don't hold the request
+        await run_in_threadpool(config_manager.update_server_status, server_id, "provisioning")
+        background_tasks.add_task(
+            run_server_setup,
             server_id, server.host, server.port, server.username, server.password, options
         )
         
-        if setup_success:
-            return {"message": f"Server added and configured successfully! {setup_message}"}
-        else:
-            return {"message": f"Server added but setup had issues: {setup_message}"}
+        return {
+            "message": "Server added successfully! Setup is running in the background.",
+            "status": "provisioning"
+        }
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/tunnels")
-async def get_tunnels(user: dict = Depends(get_current_user)):
-    tunnels = config_manager.get_tunnels()
-    for tunnel_id, tunnel in tunnels.items():
-        status = tunnel_manager.get_tunnel_status(tunnel_id)
-        tunnel["status"] = status["status"]
-        tunnel["id"] = tunnel_id
-        # Ensure tunnel_type is set (default to tcp for backwards compatibility)
-        if "tunnel_type" not in tunnel:
-            tunnel["tunnel_type"] = "tcp"
-    return tunnels
+async def get_tunnels(request: Request, response: Response, user: dict = Depends(get_session_user)):
+    # One listening-port snapshot for every tunnel instead of a probe each;
+    # it reads the socket table, so keep it off the event loop
+    statuses = await run_in_threadpool(tunnel_manager.get_all_tunnels_status)
+    etag = f"t{config_manager.records_version}-{status_fingerprint(statuses)}"
+    not_modified = check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
+    return tunnels_payload(statuses)
+
+@app.get("/api/dashboard")
+async def get_dashboard(request: Request, response: Response, user: dict = Depends(get_session_user)):
+    # Everything loadData() needs in one request: one auth check per poll, not three
+    stats = await get_stats(user)
+    statuses = await run_in_threadpool(tunnel_manager.get_all_tunnels_status)
+    etag = f"d{config_manager.records_version}-{stats['active_tunnels']}-{status_fingerprint(statuses)}"
+    not_modified = check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
+    return {
+        "stats": stats,
+        "servers": servers_payload(),
+        "tunnels": tunnels_payload(statuses)
+    }
 
 @app.post("/api/tunnels")
 async def add_tunnel(tunnel: TunnelCreate, user: dict = Depends(get_current_user)):
@@ -853,7 +1020,7 @@ async def add_tunnel(tunnel: TunnelCreate, user: dict = Depends(get_current_user
         tunnel_id = f"{tunnel.name}_{tunnel.local_port}".replace(" ", "_").lower()
         
         # Add tunnel configuration
-        config_manager.add_tunnel(tunnel_id, {
+        await run_in_threadpool(config_manager.add_tunnel, tunnel_id, {
             "name": tunnel.name,
             "server_id": tunnel.server_id,
             "local_port": tunnel.local_port,
@@ -863,10 +1030,11 @@ async def add_tunnel(tunnel: TunnelCreate, user: dict = Depends(get_current_user
             "description": tunnel.description,
             "auto_start": tunnel.auto_start
         })
+        invalidate_stats()
         
         # Start tunnel if auto_start is enabled
         if tunnel.auto_start:
-            success, message = tunnel_manager.create_tunnel(tunnel_id)
+            success, message = await run_in_threadpool(tunnel_manager.create_tunnel, tunnel_id)
             if success:
                 return {"message": f"Tunnel created and started successfully! {message}"}
             else:
@@ -880,11 +1048,12 @@ async def add_tunnel(tunnel: TunnelCreate, user: dict = Depends(get_current_user
 @app.post("/api/tunnels/{tunnel_id}/toggle")
 async def toggle_tunnel(tunnel_id: str, user: dict = Depends(get_current_user)):
     try:
-        status = tunnel_manager.get_tunnel_status(tunnel_id)
+        status = await run_in_threadpool(tunnel_manager.get_tunnel_status, tunnel_id)
         if status["status"] == "active":
-            success, message = tunnel_manager.destroy_tunnel(tunnel_id)
+            success, message = await run_in_threadpool(tunnel_manager.destroy_tunnel, tunnel_id)
         else:
-            success, message = tunnel_manager.create_tunnel(tunnel_id)
+            success, message = await run_in_threadpool(tunnel_manager.create_tunnel, tunnel_id)
+        invalidate_stats()
         
         if success:
             return {"message": message}
@@ -897,7 +1066,7 @@ async def toggle_tunnel(tunnel_id: str, user: dict = Depends(get_current_user)):
 @app.post("/api/tunnels/{tunnel_id}/test")
 async def test_tunnel(tunnel_id: str, user: dict = Depends(get_current_user)):
     try:
-        success, message = tunnel_manager.test_tunnel_connectivity(tunnel_id)
+        success, message = await run_in_threadpool(tunnel_manager.test_tunnel_connectivity, tunnel_id)
         return {"success": success, "message": message}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -907,31 +1076,69 @@ async def delete_tunnel(tunnel_id: str, user: dict = Depends(get_current_user)):
     try:
         # Stop tunnel if running
         if tunnel_id in tunnel_manager.active_tunnels:
-            tunnel_manager.destroy_tunnel(tunnel_id)
+            await run_in_threadpool(tunnel_manager.destroy_tunnel, tunnel_id)
         
         # Remove from config
-        config_manager.remove_tunnel(tunnel_id)
+        await run_in_threadpool(config_manager.remove_tunnel, tunnel_id)
+        invalidate_stats()
         return {"message": "Tunnel deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def remove_server_and_tunnels(server_id: str):
+    """Stop and remove every tunnel of a server, then the server itself"""
+    # Copy: remove_tunnel deletes from the dict being walked
+    tunnels = list(config_manager.get_tunnels().items())
+    for tunnel_id, tunnel in tunnels:
+        if tunnel["server_id"] == server_id:
+            if tunnel_id in tunnel_manager.active_tunnels:
+                tunnel_manager.destroy_tunnel(tunnel_id)
+            config_manager.remove_tunnel(tunnel_id)
+    
+    config_manager.remove_server(server_id)
+
 @app.delete("/api/servers/{server_id}")
 async def delete_server(server_id: str, user: dict = Depends(get_current_user)):
     try:
-        # Stop all tunnels for this server
-        tunnels = config_manager.get_tunnels()
-        for tunnel_id, tunnel in tunnels.items():
-            if tunnel["server_id"] == server_id:
-                if tunnel_id in tunnel_manager.active_tunnels:
-                    tunnel_manager.destroy_tunnel(tunnel_id)
-                config_manager.remove_tunnel(tunnel_id)
-        
-        # Remove server
-        config_manager.remove_server(server_id)
+        # Stops tunnels (process kills, remote cleanup); off the event loop
+        await run_in_threadpool(remove_server_and_tunnels, server_id)
+        invalidate_stats()
         return {"message": "Server and all its tunnels deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+BACKUP_MEMBER = "backup.json"
+
+def build_backup_archive(backup_data: Dict) -> bytes:
+    """Pack backup data as a gzipped tar holding backup.json"""
+    data = json.dumps(backup_data, indent=2, ensure_ascii=False).encode()
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz", compresslevel=6) as tar:
+        info = tarfile.TarInfo(BACKUP_MEMBER)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+def read_backup_archive(content: bytes) -> Dict:
+    """Unpack a backup archive; plain JSON files from older versions are accepted too"""
+    if content[:2] != b"\x1f\x8b":
+        return json.loads(content.decode())
+    try:
+        with tarfile.open(fileobj=io.BytesIO(content), mode="r:gz") as tar:
+            member = tar.extractfile(BACKUP_MEMBER)
+            return json.loads(member.read().decode())
+    except (tarfile.TarError, OSError, EOFError, KeyError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid backup file format")
+
+def restore_backup_records(backup_data: Dict):
+    """Write the servers and tunnels of a backup back into the config"""
+    for server_id, server_data in backup_data["servers"].items():
+        config_manager.add_server(server_id, server_data)
+    
+    for tunnel_id, tunnel_data in backup_data["tunnels"].items():
+        config_manager.add_tunnel(tunnel_id, tunnel_data)
+
 @app.post("/api/backup/create")
 async def create_backup_endpoint(user: dict = Depends(get_current_user)):
     try:
@@ -944,15 +1151,17 @@ async def create_backup_endpoint(user: dict = Depends(get_current_user)):
             "settings": config_manager.config.get("settings", {})
         }
         
-        # Create temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.json')
-        temp_file.write(json.dumps(backup_data, indent=2).encode())
-        temp_file.close()
-        
-        return FileResponse(
-            temp_file.name, 
-            media_type='application/json', 
-            filename=f'pasrah_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
+        # Built in memory: no temp file left behind per download
+        archive = await run_in_threadpool(build_backup_archive, backup_data)
+        filename = f'pasrah_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.tar.gz'
+        return Response(
+            archive,
+            media_type='application/gzip',
+            headers={
+                "Content-Disposition": f'attachment; filename="{filename}"',
+                # Already gzip; an explicit encoding makes GZipMiddleware pass it through
+                "Content-Encoding": "identity"
+            }
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -962,25 +1171,22 @@ async def restore_backup_endpoint(backup_file: UploadFile = File(...), user: dic
     try:
         # Read backup file
         content = await backup_file.read()
-        backup_data = json.loads(content.decode())
+        backup_data = read_backup_archive(content)
         
         # Validate backup format
         if "servers" not in backup_data or "tunnels" not in backup_data:
             raise HTTPException(status_code=400, detail="Invalid backup file format")
         
         # Stop all current tunnels
-        for tunnel_id in list(tunnel_manager.active_tunnels.keys()):
-            tunnel_manager.destroy_tunnel(tunnel_id)
-        
-        # Restore servers
-        for server_id, server_data in backup_data["servers"].items():
-            config_manager.add_server(server_id, server_data)
+        await run_in_threadpool(tunnel_manager.destroy_all_tunnels)
         
-        # Restore tunnels
-        for tunnel_id, tunnel_data in backup_data["tunnels"].items():
-            config_manager.add_tunnel(tunnel_id, tunnel_data)
+        # Each record is a database write; off the event loop
+        await run_in_threadpool(restore_backup_records, backup_data)
         
+        invalidate_stats()
         return {"message": "Backup restored successfully!"}
+    except HTTPException:
+        raise
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid JSON format in backup file")
     except Exception as e:
@@ -988,4 +1194,4 @@ async def restore_backup_endpoint(backup_file: UploadFile = File(...), user: dic
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8080)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8080, access_log=False)
\ No newline at end of file